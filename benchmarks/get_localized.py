@@ -0,0 +1,60 @@
+""" micro-benchmarks of the paths of get_localized, using an in-memory
+SQLite database
+
+    default    the language is the default one, not remembered
+    remembered the translation is remembered by the entity
+    loaded     the translation is in the session, not remembered
+    missing    there is no translation, not remembered
+
+usage: python benchmarks/get_localized.py [calls]
+"""
+import sys
+from time import time
+
+from elixir import Entity, has_field, using_options, Unicode
+from elixir import metadata, session, setup_all, create_all
+from elixirext.localized import acts_as_localized
+
+
+class Article(Entity):
+    has_field('title', Unicode)
+    using_options(tablename='articles')
+    acts_as_localized(for_fields=['title'])
+
+
+def forget(article):
+    article.__dict__.pop('_localized_slot', None)
+
+
+def run(article, locale_string, calls, reset):
+    elapsed = 0
+    for i in xrange(calls):
+        if reset:
+            forget(article)
+        start = time()
+        article.get_localized(locale_string)
+        elapsed += time() - start
+    return elapsed / calls
+
+
+def main(calls=2000):
+    metadata.bind = 'sqlite://'
+    setup_all()
+    create_all()
+    article = Article(title=u'title')
+    article.add_locale('fr', title=u'titre')
+    session.commit()
+    # the identity map holds weak references
+    translation = article.get_localized('fr')
+    print '%d calls' % calls
+    print '%-12s %12s' % ('path', 'per call')
+    for name, locale_string, reset in (('default', 'en', True),
+                                       ('remembered', 'fr', False),
+                                       ('loaded', 'fr', True),
+                                       ('missing', 'de', True)):
+        print '%-12s %10.1fus' % (name, run(article, locale_string, calls,
+                                             reset) * 1e6)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
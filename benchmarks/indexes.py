@@ -0,0 +1,96 @@
+""" compares the query plans and times of the reads of the localized
+tables by language with and without the locale_index option, using an
+in-memory SQLite database, 1M translation rows by default
+
+usage: python benchmarks/indexes.py [entities] [locales] [repeat]
+"""
+import sys
+from time import time
+
+from sqlalchemy import select, func
+from elixir import Entity, has_field, using_options, Unicode
+from elixir import metadata, session, setup_all, create_all
+from elixirext.localized import acts_as_localized
+
+
+class Indexed(Entity):
+    has_field('title', Unicode)
+    using_options(tablename='indexed')
+    acts_as_localized(for_fields=['title'])
+
+class Unindexed(Entity):
+    has_field('title', Unicode)
+    using_options(tablename='unindexed')
+    acts_as_localized(for_fields=['title'], locale_index=False)
+
+
+def fill(entity, entities, locales):
+    """ writes the rows straight to the tables, in chunks
+    """
+    session.execute(entity.table.insert(),
+                    [{'id': i, 'title': u'title %d' % i, 'default_locale': u'en'}
+                     for i in xrange(1, entities + 1)])
+    table = entity.__localized_table__
+    identity = '%s_localized' % entity.__name__.lower()
+    for locale in xrange(locales):
+        session.execute(table.insert(),
+                        [{'translated_id': i, 'locale_id': 'l%d' % locale,
+                          'title': u'title %d' % i,
+                          'translated_type': identity}
+                         for i in xrange(1, entities + 1)])
+    session.commit()
+
+
+def queries(entity, locale_string, entities):
+    table = entity.__localized_table__
+    return [
+        ('count a locale', select([func.count()],
+                                  table.c.locale_id==locale_string)),
+        ('list a locale', select([table.c.translated_id, table.c.title],
+                                 table.c.locale_id==locale_string)),
+        ('one translation', select([table.c.title],
+                                   (table.c.translated_id==entities / 2) &
+                                   (table.c.locale_id==locale_string)))]
+
+
+def plan(statement):
+    compiled = statement.compile(bind=metadata.bind)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    connection = session.connection(clause=statement)
+    rows = connection.execute('EXPLAIN QUERY PLAN %s' % compiled,
+                              params).fetchall()
+    return '; '.join(row[len(row) - 1] for row in rows)
+
+
+def timed(statement, repeat):
+    best = None
+    for i in xrange(repeat):
+        start = time()
+        session.execute(statement).fetchall()
+        elapsed = time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main(entities=50000, locales=20, repeat=5):
+    metadata.bind = 'sqlite://'
+    setup_all()
+    create_all()
+    for entity in (Indexed, Unindexed):
+        fill(entity, entities, locales)
+    # the statistics of a database in use, which the planner relies on
+    session.connection(mapper=Indexed.mapper).execute('ANALYZE')
+    print '%d entities x %d locales = %d translation rows' % (
+          entities, locales, entities * locales)
+    locale_string = 'l%d' % (locales / 2)
+    for entity in (Unindexed, Indexed):
+        print '\n%s (locale_index=%s)' % (entity.__name__,
+                                         entity is Indexed)
+        for name, statement in queries(entity, locale_string, entities):
+            print '  %-16s %9.2fms  %s' % (name, timed(statement, repeat) * 1e3,
+                                          plan(statement))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,65 @@
+""" compares the 'table' and 'json' localized storages across locale counts,
+using an in-memory SQLite database
+
+usage: python benchmarks/json_storage.py [entities] [locale counts...]
+"""
+import sys
+from time import time
+
+from elixir import Entity, has_field, using_options, Unicode
+from elixir import metadata, session, setup_all, create_all, drop_all
+from elixirext.localized import acts_as_localized
+
+
+class TableArticle(Entity):
+    has_field('title', Unicode)
+    has_field('content', Unicode)
+    using_options(tablename='table_articles')
+    acts_as_localized(for_fields=['title', 'content'])
+
+class JsonArticle(Entity):
+    has_field('title', Unicode)
+    has_field('content', Unicode)
+    using_options(tablename='json_articles')
+    acts_as_localized(for_fields=['title', 'content'], storage='json')
+
+
+def timed(function, *args):
+    start = time()
+    function(*args)
+    return time() - start
+
+
+def write(entity, count, locales):
+    for i in xrange(count):
+        article = entity(title=u'title %d' % i, content=u'content')
+        for locale_string in locales:
+            article.add_locale(locale_string, title=u'title', content=u'content')
+    session.commit()
+
+
+def read(entity, locales):
+    for article in entity.query.all():
+        for locale_string in locales:
+            article.get_localized(locale_string).title
+
+
+def main(count=500, *locale_counts):
+    metadata.bind = 'sqlite://'
+    setup_all()
+    print '%d entities' % count
+    print '%-8s %8s %10s %10s' % ('storage', 'locales', 'write', 'read')
+    for locale_count in locale_counts or (2, 10, 30):
+        locales = ['l%d' % i for i in range(locale_count)]
+        create_all()
+        for name, entity in (('table', TableArticle), ('json', JsonArticle)):
+            timings = [timed(write, entity, count, locales)]
+            session.expunge_all()
+            timings.append(timed(read, entity, locales))
+            session.expunge_all()
+            print '%-8s %8d %9.3fs %9.3fs' % tuple([name, locale_count] + timings)
+        drop_all()
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
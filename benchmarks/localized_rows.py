@@ -0,0 +1,66 @@
+""" compares reading translations as mapped objects and as localized_rows
+records, using an in-memory SQLite database
+
+usage: python benchmarks/localized_rows.py [entities]
+"""
+import gc
+import sys
+from time import time
+
+from elixir import Entity, has_field, using_options, Unicode
+from elixir import metadata, session, setup_all, create_all
+from elixirext.localized import acts_as_localized
+
+
+class Article(Entity):
+    has_field('author', Unicode)
+    has_field('title', Unicode)
+    has_field('content', Unicode)
+    using_options(tablename='articles')
+    acts_as_localized(for_fields=['title', 'content'])
+
+
+def objects():
+    translations = Article.localize_many(Article.query.all(), 'fr').values()
+    for localized in translations:
+        localized.id, localized.author, localized.title, localized.content
+    return translations
+
+
+def rows():
+    return list(Article.localized_rows('fr', fields=['id', 'author', 'title',
+                                                     'content']))
+
+
+def measure(function):
+    gc.collect()
+    before = len(gc.get_objects())
+    start = time()
+    result = function()
+    elapsed = time() - start
+    gc.collect()
+    objects = len(gc.get_objects()) - before
+    session.expunge_all()
+    return len(result), elapsed, objects
+
+
+def main(count=5000):
+    metadata.bind = 'sqlite://'
+    setup_all()
+    create_all()
+    for i in xrange(count):
+        article = Article(author=u'author', title=u'title %d' % i,
+                          content=u'content')
+        article.add_locale('fr', title=u'titre %d' % i, content=u'contenu')
+    session.commit()
+    session.expunge_all()
+    print '%d translations' % count
+    print '%-8s %10s %12s %14s' % ('read', 'time', 'rows/s', 'gc objects/row')
+    for name, function in (('objects', objects), ('rows', rows)):
+        read, elapsed, created = measure(function)
+        print '%-8s %9.3fs %12d %14.1f' % (name, elapsed, read / elapsed,
+                                           float(created) / read)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
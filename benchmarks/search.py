@@ -0,0 +1,103 @@
+""" compares searching a word in the translations of a language with the
+search option and with a LIKE scan of the localized table joined to the
+entities, and the cost of keeping the index in sync on inserts, using an
+in-memory SQLite database
+
+usage: python benchmarks/search.py [entities] [searches]
+"""
+import sys
+from time import time
+
+from sqlalchemy import select, and_, or_
+from elixir import Entity, has_field, using_options, Unicode
+from elixir import metadata, session, setup_all, create_all
+from elixirext.localized import acts_as_localized
+
+WORDS = [u'alpha', u'bravo', u'charlie', u'delta', u'echo', u'foxtrot',
+         u'golf', u'hotel', u'india', u'juliett', u'kilo', u'lima']
+
+
+class Article(Entity):
+    has_field('author', Unicode)
+    has_field('title', Unicode)
+    has_field('content', Unicode)
+    using_options(tablename='articles')
+    acts_as_localized(for_fields=['title', 'content'], search=True)
+
+class Plain(Entity):
+    has_field('author', Unicode)
+    has_field('title', Unicode)
+    has_field('content', Unicode)
+    using_options(tablename='plain')
+    acts_as_localized(for_fields=['title', 'content'])
+
+
+def text(i, rare):
+    words = [WORDS[(i * 7 + j) % len(WORDS)] for j in range(40)]
+    if i % 100 == 0:
+        words.append(rare)
+    return u' '.join(words)
+
+
+def fill(entity, count):
+    start = time()
+    for i in xrange(count):
+        article = entity(author=u'author', title=u'title %d' % i,
+                         content=text(i, u'zulu'))
+        # a third of the entities are left untranslated
+        if i % 3:
+            article.add_locale('fr', title=u'titre %d' % i,
+                               content=text(i, u'xray'))
+    session.commit()
+    session.expunge_all()
+    return time() - start
+
+
+def like(word, limit=20):
+    """ the translation of an entity, or the entity if it has none,
+    containing word
+    """
+    table = Article.table
+    localized = Article.__localized_table__
+    pattern = u'%%%s%%' % word
+    query = select([table.c.id], or_(
+                and_(localized.c.translated_id != None,
+                     or_(localized.c.title.like(pattern),
+                         localized.c.content.like(pattern))),
+                and_(localized.c.translated_id == None,
+                     or_(table.c.title.like(pattern),
+                         table.c.content.like(pattern)))),
+                from_obj=[table.outerjoin(localized, and_(
+                    localized.c.translated_id==table.c.id,
+                    localized.c.locale_id=='fr'))]).limit(limit)
+    ids = [row[0] for row in session.execute(query)]
+    return Article.query.filter(Article.id.in_(ids)).all()
+
+
+def search(word):
+    return Article.search(word, locale='fr')
+
+
+def main(count=5000, searches=50):
+    metadata.bind = 'sqlite://'
+    setup_all()
+    create_all()
+    plain = fill(Plain, count)
+    indexed = fill(Article, count)
+    print '%d entities, 2/3 translated' % count
+    print '%-14s %9.3fs' % ('insert', plain)
+    print '%-14s %9.3fs' % ('insert+index', indexed)
+    print '%-8s %8s %12s' % ('search', 'matches', 'us/search')
+    for name, function in (('like', like), ('search', search)):
+        for word in (u'xray', u'zulu'):
+            start = time()
+            for i in xrange(searches):
+                found = function(word)
+                session.expunge_all()
+            elapsed = time() - start
+            print '%-8s %8d %12.1f  (%s)' % (name, len(found),
+                                             elapsed / searches * 1e6, word)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,76 @@
+""" measures the time spent defining and setting up synthetic localized
+entities, a third of them inheriting from the previous one, with the
+share of each phase of the localized builder
+
+usage: python benchmarks/setup.py [entities] [--profile]
+"""
+import sys
+import cProfile
+import pstats
+from time import time
+
+from elixir import metadata, setup_all
+from elixirext.localized import LocalizedStats, set_localized_stats
+
+ROOT = '''
+class Entity%(i)d(Entity):
+    has_field('author', Unicode)
+    has_field('title', Unicode)
+    has_field('content', Unicode)
+    has_field('summary', Unicode)
+    has_field('release', Date)
+    has_field('views', Integer)
+    using_options(tablename='entity%(i)d')
+    acts_as_localized(for_fields=['title', 'content', 'summary'])
+'''
+
+CHILD = '''
+class Entity%(i)d(Entity%(parent)d):
+    has_field('resume', Unicode)
+    using_options(inheritance='multi', polymorphic=True,
+                  tablename='entity%(i)d')
+    acts_as_localized(for_fields=['resume'])
+'''
+
+
+def source(entities):
+    """ returns the code defining the entities
+    """
+    code = ['from elixir import *',
+            'from elixirext.localized import acts_as_localized']
+    for i in xrange(entities):
+        if i % 3 == 2:
+            code.append(CHILD % {'i': i, 'parent': i - 1})
+        else:
+            code.append(ROOT % {'i': i})
+    return '\n'.join(code)
+
+
+def main(entities=150, profile=False):
+    code = compile(source(entities), '<entities>', 'exec')
+    metadata.bind = 'sqlite://'
+    stats = LocalizedStats()
+    set_localized_stats(stats)
+    start = time()
+    exec code in {}
+    defined = time() - start
+    profiler = cProfile.Profile()
+    start = time()
+    if profile:
+        profiler.runcall(setup_all)
+    else:
+        setup_all()
+    elapsed = time() - start
+    set_localized_stats(None)
+    print '%d entities' % entities
+    print '%-24s %8.1fms' % ('class definitions', defined * 1e3)
+    print '%-24s %8.1fms' % ('setup_all', elapsed * 1e3)
+    for name in sorted(stats.timings):
+        print '  %-22s %8.1fms' % (name, stats.timings[name] * 1e3)
+    if profile:
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(30)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:] if arg != '--profile'],
+         **{'profile': '--profile' in sys.argv})
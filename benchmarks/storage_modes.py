@@ -0,0 +1,97 @@
+""" compares the 'table' (joined) and 'single' localized storage modes
+on a three levels hierarchy, using an in-memory SQLite database
+
+usage: python benchmarks/storage_modes.py [entities] [locales]
+"""
+import sys
+from time import time
+
+from elixir import Entity, has_field, using_options, Unicode
+from elixir import metadata, session, setup_all, create_all
+from elixirext.localized import acts_as_localized
+
+
+class JoinedMedia(Entity):
+    has_field('title', Unicode)
+    using_options(tablename='joined_media')
+    acts_as_localized(for_fields=['title'], storage='table')
+
+class JoinedMovie(JoinedMedia):
+    has_field('resume', Unicode)
+    using_options(inheritance='multi', polymorphic=True,
+                  tablename='joined_movie')
+    acts_as_localized(for_fields=['resume'])
+
+class JoinedEpisode(JoinedMovie):
+    has_field('season', Unicode)
+    using_options(inheritance='multi', polymorphic=True,
+                  tablename='joined_episode')
+    acts_as_localized(for_fields=['season'])
+
+
+class SingleMedia(Entity):
+    has_field('title', Unicode)
+    using_options(tablename='single_media')
+    acts_as_localized(for_fields=['title'], storage='single')
+
+class SingleMovie(SingleMedia):
+    has_field('resume', Unicode)
+    using_options(inheritance='multi', polymorphic=True,
+                  tablename='single_movie')
+    acts_as_localized(for_fields=['resume'])
+
+class SingleEpisode(SingleMovie):
+    has_field('season', Unicode)
+    using_options(inheritance='multi', polymorphic=True,
+                  tablename='single_episode')
+    acts_as_localized(for_fields=['season'])
+
+
+def timed(function, *args):
+    start = time()
+    function(*args)
+    return time() - start
+
+
+def write(entity, count, locales):
+    for i in xrange(count):
+        episode = entity(title=u'title %d' % i, resume=u'resume',
+                         season=u'season')
+        for locale_string in locales:
+            episode.add_locale(locale_string, title=u'title', resume=u'resume',
+                               season=u'season')
+    session.commit()
+
+
+def read(entity, locales):
+    for episode in entity.query.all():
+        for locale_string in locales:
+            episode.get_localized(locale_string).season
+
+
+def read_many(entity, locales):
+    episodes = entity.query.all()
+    for locale_string in locales:
+        for localized in entity.localize_many(episodes, locale_string).values():
+            localized.season
+
+
+def main(count=1000, locale_count=5):
+    metadata.bind = 'sqlite://'
+    setup_all()
+    create_all()
+    locales = ['l%d' % i for i in range(locale_count)]
+    print '%d entities, %d locales' % (count, locale_count)
+    print '%-8s %10s %10s %14s' % ('storage', 'write', 'read', 'localize_many')
+    for name, entity in (('table', JoinedEpisode), ('single', SingleEpisode)):
+        timings = [timed(write, entity, count, locales)]
+        session.expunge_all()
+        timings.append(timed(read, entity, locales))
+        session.expunge_all()
+        timings.append(timed(read_many, entity, locales))
+        session.expunge_all()
+        print '%-8s %9.3fs %9.3fs %13.3fs' % tuple([name] + timings)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
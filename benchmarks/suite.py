@@ -0,0 +1,282 @@
+""" benchmark suite of the localized extension, on synthetic Article and
+Media/Movie/Image datasets, with SQLite in memory or in a file
+
+results are written as JSON to be compared between runs, a summary being
+printed on stderr
+
+usage: python benchmarks/suite.py [options]
+
+    -e, --entities N     entities per dataset (default 200)
+    -l, --locales N      locales per entity (default 5)
+    -d, --database DB    'memory' or 'file', can be repeated (default memory)
+    -o, --output FILE    where to write the results (default stdout)
+    -c, --compare FILE   results of a previous run to compare with
+"""
+import os
+import sys
+import platform
+import tempfile
+from optparse import OptionParser
+from time import time
+
+import sqlalchemy
+from sqlalchemy import create_engine
+from sqlalchemy.interfaces import PoolListener
+from elixir import Entity, has_field, using_options, Unicode, Integer
+from elixir import metadata, session, setup_all, create_all, drop_all
+from elixirext.localized import acts_as_localized
+
+try:
+    import json
+except ImportError: # python < 2.6
+    import simplejson as json
+
+
+class Article(Entity):
+    has_field('author', Unicode)
+    has_field('title', Unicode)
+    has_field('content', Unicode)
+    using_options(tablename='bench_articles')
+    acts_as_localized(for_fields=['title', 'content'])
+
+class Media(Entity):
+    has_field('author', Unicode)
+    has_field('title', Unicode)
+    has_field('content', Unicode)
+    using_options(tablename='bench_media')
+    acts_as_localized(for_fields=['title', 'content'])
+
+class Movie(Media):
+    has_field('resume', Unicode)
+    using_options(inheritance='multi', polymorphic=True,
+                  tablename='bench_movie')
+    acts_as_localized(for_fields=['resume'])
+
+class Image(Media):
+    has_field('width', Integer)
+    using_options(inheritance='multi', polymorphic=True,
+                  tablename='bench_image')
+
+
+class ForeignKeys(PoolListener):
+    """ makes SQLite enforce foreign keys, for translations to be
+    deleted by ON DELETE CASCADE
+    """
+
+    def connect(self, dbapi_con, con_record):
+        dbapi_con.execute('PRAGMA foreign_keys = ON')
+
+
+def fresh():
+    """ starts over with an empty session, as a new request would
+    """
+    session.commit()
+    session.expunge_all()
+
+
+class Suite(object):
+    """ runs the benchmarks, each one timing ops operations
+    """
+
+    def __init__(self, entities, locales):
+        self.entities = entities
+        self.locales = ['l%d' % i for i in range(locales)]
+        self.results = []
+
+    def timed(self, name, ops, function, *args):
+        start = time()
+        function(*args)
+        seconds = time() - start
+        self.results.append({'name': name,
+                             'ops': ops,
+                             'seconds': seconds,
+                             'per_op_us': seconds / max(ops, 1) * 1e6,
+                             'ops_per_s': ops / seconds if seconds else None})
+
+    # the datasets
+
+    def add_articles(self):
+        for i in xrange(self.entities):
+            article = Article(author=u'author', title=u'title %d' % i,
+                              content=u'content %d' % i)
+            for locale_string in self.locales:
+                article.add_locale(locale_string, title=u'title',
+                                   content=u'content')
+        session.commit()
+
+    def add_media(self):
+        for i in xrange(self.entities):
+            if i % 2:
+                media = Movie(author=u'author', title=u'movie %d' % i,
+                              resume=u'resume')
+                fields = {'title': u'title', 'resume': u'resume'}
+            else:
+                media = Image(author=u'author', title=u'image %d' % i,
+                              width=i)
+                fields = {'title': u'title'}
+            for locale_string in self.locales:
+                media.add_locale(locale_string, **fields)
+        session.commit()
+
+    # the operations
+
+    def get_localized(self, articles, locale_string):
+        for article in articles:
+            article.get_localized(locale_string)
+
+    def get_many_localized(self, articles):
+        for article in articles:
+            article.get_many_localized(self.locales)
+
+    def localized_pivot(self):
+        for row in Article.localized_pivot(self.locales):
+            row.title_l0
+
+    def get_all_localized(self, articles):
+        for article in articles:
+            article.get_all_localized()
+
+    def delete_locale(self, articles, locale_string):
+        for article in articles:
+            article.delete_locale(locale_string)
+        session.commit()
+
+    def purge_locale(self, locale_string):
+        Article.purge_locale(locale_string)
+        session.commit()
+
+    def polymorphic_load(self, locale_string):
+        media = Media.query.all()
+        for media, localized in Media.localize_many(media,
+                                                    locale_string).iteritems():
+            localized.title
+            if isinstance(media, Movie):
+                localized.resume
+
+    def cascade_delete(self):
+        for media in Media.query.all():
+            session.delete(media)
+        session.commit()
+
+    def run(self):
+        count = self.entities * len(self.locales)
+        locale_string = self.locales[0]
+        self.timed('add_locale', count, self.add_articles)
+        fresh()
+        articles = Article.query.all()
+        self.timed('get_localized_query', len(articles), self.get_localized,
+                   articles, locale_string)
+        self.timed('get_localized_hit', len(articles), self.get_localized,
+                   articles, locale_string)
+        fresh()
+        articles = Article.query.all()
+        self.timed('get_localized_miss', len(articles), self.get_localized,
+                   articles, 'missing')
+        fresh()
+        articles = Article.query.all()
+        self.timed('get_many_localized', len(articles),
+                   self.get_many_localized, articles)
+        fresh()
+        self.timed('localized_pivot', self.entities, self.localized_pivot)
+        fresh()
+        articles = Article.query.all()
+        self.timed('get_all_localized', len(articles), self.get_all_localized,
+                   articles)
+        fresh()
+        articles = Article.query.all()
+        self.timed('delete_locale', len(articles), self.delete_locale,
+                   articles, self.locales[-1])
+        fresh()
+        self.timed('purge_locale', self.entities, self.purge_locale,
+                   locale_string)
+        fresh()
+        self.timed('add_locale_polymorphic', count, self.add_media)
+        fresh()
+        self.timed('polymorphic_load', self.entities, self.polymorphic_load,
+                   locale_string)
+        fresh()
+        self.timed('cascade_delete', self.entities, self.cascade_delete)
+        fresh()
+        return self.results
+
+
+def run(database, entities, locales):
+    """ returns the results of the suite on a database
+    """
+    path = None
+    if database == 'file':
+        handle, path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        url = 'sqlite:///%s' % path
+    else:
+        url = 'sqlite://'
+    metadata.bind = create_engine(url, listeners=[ForeignKeys()])
+    session.close()
+    create_all()
+    try:
+        return Suite(entities, locales).run()
+    finally:
+        session.close()
+        drop_all()
+        if path is not None:
+            os.remove(path)
+
+
+def compare(results, previous):
+    """ prints the ratio of the time per operation with a previous run
+    """
+    before = dict(((run['database'], result['name']), result['per_op_us'])
+                  for run in previous['runs'] for result in run['results'])
+    print >> sys.stderr, '\n%-8s %-24s %10s %10s %8s' % (
+                         'database', 'benchmark', 'before', 'after', 'ratio')
+    for run in results['runs']:
+        for result in run['results']:
+            key = (run['database'], result['name'])
+            if key in before:
+                print >> sys.stderr, '%-8s %-24s %8.1fus %8.1fus %7.2fx' % (
+                        run['database'], result['name'], before[key],
+                        result['per_op_us'],
+                        result['per_op_us'] / before[key])
+
+
+def main(argv):
+    parser = OptionParser(usage='%prog [options]')
+    parser.add_option('-e', '--entities', type='int', default=200)
+    parser.add_option('-l', '--locales', type='int', default=5)
+    parser.add_option('-d', '--database', action='append',
+                      choices=['memory', 'file'])
+    parser.add_option('-o', '--output')
+    parser.add_option('-c', '--compare')
+    options, args = parser.parse_args(argv)
+
+    setup_all()
+    results = {'python': platform.python_version(),
+               'sqlalchemy': sqlalchemy.__version__,
+               'entities': options.entities,
+               'locales': options.locales,
+               'time': time(),
+               'runs': []}
+    for database in options.database or ['memory']:
+        run_results = run(database, options.entities, options.locales)
+        results['runs'].append({'database': database,
+                                'results': run_results})
+        print >> sys.stderr, '\n%s, %d entities, %d locales' % (
+                             database, options.entities, options.locales)
+        for result in run_results:
+            print >> sys.stderr, '%-24s %8d ops %9.3fs %10.1fus/op' % (
+                    result['name'], result['ops'], result['seconds'],
+                    result['per_op_us'])
+
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if options.output:
+        fileobj = open(options.output, 'w')
+        fileobj.write(output)
+        fileobj.close()
+    else:
+        print output
+    if options.compare:
+        compare(results, json.load(open(options.compare)))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,7 +1,17 @@
 from sqlalchemy            import Table, Column, and_, desc, ForeignKey
+from sqlalchemy            import select, bindparam, literal, func, \
+                                  union, exists, case
+from sqlalchemy.types      import TypeDecorator, Text
 from sqlalchemy.orm        import mapper, MapperExtension, EXT_CONTINUE, \
-                                  object_session, relation
-from sqlalchemy            import ForeignKeyConstraint
+                                  object_session, relation, create_session
+from sqlalchemy.orm.interfaces import SessionExtension
+from sqlalchemy            import ForeignKeyConstraint, Index
+from sqlalchemy.orm        import class_mapper, object_mapper, ColumnProperty
+from sqlalchemy.orm.attributes import instance_state, set_committed_value
+from sqlalchemy.orm.scoping import ScopedSession
+from sqlalchemy.engine.base import Engine
+from sqlalchemy.pool       import StaticPool
+from sqlalchemy.interfaces import ConnectionProxy
 from elixir                import Integer, DateTime
 from elixir                import String
 from elixir                import Unicode
@@ -11,40 +21,3400 @@ from elixir.entity         import getmembers
 
 from zope.interface import implementedBy, classImplements
 
-from sqlalchemy.ext.associationproxy import association_proxy, \
-                                    AssociationProxy
+from time import time
+from Queue import Queue
+import threading
+from weakref import WeakKeyDictionary, ref
+from uuid import uuid4
+from contextlib import contextmanager
+from datetime import datetime
+import csv
+import re
+try:
+    import json
+except ImportError: # python < 2.6
+    import simplejson as json
 
+try:
+    from collections import OrderedDict
+except ImportError: # python < 2.7
+    OrderedDict = None
+from collections import namedtuple
+from itertools import islice
 
-__all__ = ['acts_as_localized']
+
+__all__ = ['acts_as_localized', 'LocalizedCache', 'LRUCacheBackend',
+           'set_localized_cache', 'get_localized_cache',
+           'LocalizedExecutor', 'set_localized_executor',
+           'get_localized_executor', 'LocalizedLoader',
+           'LocalizedStats', 'set_localized_stats', 'get_localized_stats',
+           'set_session_stats', 'record_localized',
+           'assert_max_localized_queries', 'instrument_engine',
+           'LocalizedSearchBackend', 'SQLiteFTSBackend',
+           'read_translations_csv', 'write_translations_csv',
+           'read_translations_json', 'write_translations_json',
+           'read_translations_po', 'write_translations_po']
 __doc_all__ = []
 
+# maximum number of bound parameters used in a single IN (...) clause,
+# kept under the SQLite limit of 999 host parameters
+IN_CLAUSE_CHUNK_SIZE = 500
+
+
+def _chunks(sequence, size):
+    """ yields successive slices of at most size items from sequence
+    """
+    sequence = list(sequence)
+    for start in xrange(0, len(sequence), size):
+        yield sequence[start:start + size]
+
+
+def _localized_slot(instance):
+    """ returns the per-instance dict holding translations already loaded
+    for an entity, keyed by locale, None meaning no translation
+    the dict is dropped once the entity gets expired (commit, rollback...)
+    """
+    slot = instance.__dict__.get('_localized_slot')
+    if slot is None or instance_state(instance).expired:
+        slot = instance.__dict__['_localized_slot'] = {}
+    return slot
+
+
+def _is_live(localized):
+    """ tells if a translation has not been deleted
+    """
+    if instance_state(localized).deleted:
+        return False
+    session = object_session(localized)
+    return session is None or localized not in session.deleted
+
+
+# marker for a translation which is not known in memory
+_MISSING = object()
+
+
+def _identity_localized(session, localized_class, translated_id, locale_string):
+    """ returns the translation already in the session, or _MISSING
+    """
+    key = class_mapper(localized_class).identity_key_from_primary_key(
+                                                [translated_id, locale_string])
+    localized = session.identity_map.get(key)
+    if localized is None or not isinstance(localized, localized_class) \
+       or instance_state(localized).expired or not _is_live(localized):
+        return _MISSING
+    return localized
+
+
+def _loaded_localized(instance, locale_string):
+    """ returns the translation already known in memory for a language,
+    None if it is known not to exist, or _MISSING if the database
+    must be queried
+    """
+    slot = _localized_slot(instance)
+    localized = slot.get(locale_string, _MISSING)
+    if localized is _MISSING:
+        relation_name = instance.__localized_versions__
+        if relation_name in instance.__dict__:
+            # the versions collection is loaded, hence authoritative
+            localized = None
+            for version in instance.__dict__[relation_name]:
+                if version.locale_id == locale_string:
+                    localized = version
+                    break
+            slot[locale_string] = localized
+    if localized is not None and localized is not _MISSING \
+       and not _is_live(localized):
+        del slot[locale_string]
+        return _MISSING
+    return localized
+
+
+def _load_instances(cls, entities):
+    """ returns the instances of cls given as instances or ids,
+    loading the latter with one IN (...) query
+    """
+    instances = [item for item in entities if isinstance(item, cls)]
+    ids = [item for item in entities if not isinstance(item, cls)]
+    for chunk in _chunks(ids, IN_CLAUSE_CHUNK_SIZE):
+        instances.extend(cls.query.filter(cls.id.in_(chunk)).all())
+    return instances
+
+
+def _preload_localized(cls, instances, locale_strings):
+    """ loads the translations of instances for many languages with one
+    IN (...) query, remembering them (missing ones included) per instance
+    """
+    localized_class = cls.__localized_class__
+    slots = dict((instance.id, _localized_slot(instance))
+                 for instance in instances)
+    for slot in slots.itervalues():
+        for locale_string in locale_strings:
+            slot[locale_string] = None
+    session = cls.query.session
+    for chunk in _chunks(slots, IN_CLAUSE_CHUNK_SIZE):
+        query = session.query(localized_class).with_polymorphic('*')
+        query = query.filter(and_(
+                    localized_class.translated_id.in_(chunk),
+                    localized_class.locale_id.in_(locale_strings)))
+        for localized in query:
+            slots[localized.translated_id][localized.locale_id] = localized
+
+
+def _all_localized_fields(cls):
+    """ returns the localized fields of an entity, inherited ones included
+    """
+    fields = []
+    for class_ in reversed(cls.__mro__):
+        fields.extend(class_.__dict__.get('__localized_fields__', ()))
+    return fields
+
+
+def _locale_chain(cls, chain):
+    """ returns a list of languages to try in turn, either given as is
+    or built from a language following the fallbacks option
+    """
+    if not isinstance(chain, basestring):
+        return list(chain)
+    fallbacks = getattr(cls, '__localized_fallbacks__', {})
+    locale_strings = [chain]
+    for locale_string in locale_strings:
+        for fallback in fallbacks.get(locale_string, ()):
+            if fallback not in locale_strings:
+                locale_strings.append(fallback)
+    return locale_strings
+
+
+class LocalizedFallback(object):
+    """ translation merged along a chain of languages, holding for every
+    localized field the first value available, everything else being read
+    from the entity
+    """
+    __slots__ = ('translated', 'locale_id', 'values')
+
+    def __init__(self, translated, locale_id, values):
+        self.translated = translated
+        self.locale_id = locale_id
+        self.values = values
+
+    def __getattr__(self, attr):
+        if attr in self.values:
+            return self.values[attr]
+        return getattr(self.translated, attr)
+
+
+def _resolve_chain(instance, chain, per_field):
+    """ returns the first translation of instance available along chain,
+    or with per_field, a LocalizedFallback merging all of them
+    """
+    candidates = {}
+    for localized in instance.get_many_localized(chain):
+        if localized is not instance:
+            candidates[localized.locale_id] = localized
+    ordered = []
+    for locale_string in chain:
+        localized = candidates.get(locale_string)
+        if localized is None and locale_string == instance.default_locale:
+            localized = instance
+        if localized is not None:
+            ordered.append(localized)
+    if not ordered:
+        return None
+    if not per_field:
+        return ordered[0]
+    values = {}
+    for name in _all_localized_fields(type(instance)):
+        values[name] = None
+        for localized in ordered:
+            value = getattr(localized, name, None)
+            if value is not None:
+                values[name] = value
+                break
+    return LocalizedFallback(instance, chain[0], values)
+
+
+def _update_fields(instance, fields):
+    """ sets the fields which changed through the instrumented attributes,
+    so that the next flush updates those columns only
+    """
+    for name, value in fields.iteritems():
+        if getattr(instance, name, _MISSING) != value:
+            setattr(instance, name, value)
+
+
+class LocalizedMapperExtension(MapperExtension):
+    """ forgets the translations remembered by an entity
+    whenever it is (re)loaded from the database, as on refresh,
+    and deletes its translations along with it
+    """
+
+    def populate_instance(self, mapper, selectcontext, row, instance, **flags):
+        instance.__dict__.pop('_localized_slot', None)
+        return EXT_CONTINUE
+
+    def reconstruct_instance(self, mapper, instance):
+        # entities loaded while a loader is active are batched together
+        loader = _active_loader(object_session(instance))
+        if loader is not None:
+            loader.register(instance)
+        return EXT_CONTINUE
+
+    def before_delete(self, mapper, connection, instance):
+        # the translations not loaded are not deleted by the ORM, nor by
+        # the database unless it enforces the ON DELETE CASCADE
+        if type(instance).__localized_storage__ == 'json':
+            return EXT_CONTINUE
+        localized_class = type(instance).__localized_class__
+        tables = _localized_tables(localized_class)
+        locale_ids = []
+        if _localized_cache is not None:
+            locale_ids = [row[0] for row in connection.execute(
+                              select([tables[0].c.locale_id],
+                                     tables[0].c.translated_id==instance.id))]
+        deleted = 0
+        for table in reversed(tables):
+            deleted += connection.execute(table.delete(
+                            table.c.translated_id==instance.id)).rowcount
+        if deleted:
+            session = object_session(instance)
+            root = class_mapper(localized_class).base_mapper.class_
+            _held_cache_writes(session, wrote=True)
+            for locale_string in locale_ids:
+                _cache_invalidate(session, 'discard', root, instance.id,
+                                  locale_string)
+        return EXT_CONTINUE
+
+
+localized_mapper_extension = LocalizedMapperExtension()
+
+
+# name of the column holding the last update of entities and translations
+UPDATED_COLUMN = 'updated_at'
+
+
+class LocalizedTimestampExtension(MapperExtension):
+    """ stamps the root table of entities and translations whose columns
+    changed, even when those columns are in a table of a subclass
+    """
+
+    def before_update(self, mapper, connection, instance):
+        session = object_session(instance)
+        if session is not None and \
+           session.is_modified(instance, include_collections=False):
+            setattr(instance, UPDATED_COLUMN, datetime.now())
+        return EXT_CONTINUE
+
+
+localized_timestamp_extension = LocalizedTimestampExtension()
+
+
+#
+# process-wide translation cache
+#
+
+class LRUCacheBackend(object):
+    """ in memory storage for the LocalizedCache, holding at most max_size
+    entries, the least recently used being evicted first
+    entries older than ttl seconds, if given, are considered missing
+
+    any mapping with string keys (a dict, a shelve, a memcached client
+    wrapper...) can be used as a backend instead, as long as it can be
+    used by many threads at once
+    """
+
+    def __init__(self, max_size=10000, ttl=None):
+        if OrderedDict is None:
+            raise RuntimeError, 'LRUCacheBackend requires python 2.7'
+        self.max_size = max_size
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries = OrderedDict()
+        # entries are moved around on every access
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key):
+        self._lock.acquire()
+        try:
+            value, stored_at = self._entries.pop(key)
+            if self.ttl is not None and time() - stored_at > self.ttl:
+                self.evictions += 1
+                raise KeyError, key
+            # most recently used entries are kept at the end
+            self._entries[key] = (value, stored_at)
+            return value
+        finally:
+            self._lock.release()
+
+    def __setitem__(self, key, value):
+        self._lock.acquire()
+        try:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, time())
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        finally:
+            self._lock.release()
+
+    def __delitem__(self, key):
+        self._lock.acquire()
+        try:
+            del self._entries[key]
+        finally:
+            self._lock.release()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._lock.acquire()
+        try:
+            self._entries.clear()
+        finally:
+            self._lock.release()
+
+
+def _column_values(localized):
+    """ returns the column values of a translation as a dict, or None
+    """
+    if localized is None:
+        return None
+    return dict((prop.key, getattr(localized, prop.key))
+                for prop in object_mapper(localized).iterate_properties
+                if isinstance(prop, ColumnProperty))
+
+
+def _merge_column_values(session, localized_class, values):
+    """ returns the translation holding column values merged into
+    session without any query, or None
+    """
+    if values is None:
+        return None
+    mapper = class_mapper(localized_class).polymorphic_map[
+                                                values['translated_type']]
+    if not issubclass(mapper.class_, localized_class):
+        return None
+    key = mapper.identity_key_from_primary_key(
+                        [values[column.key] for column in mapper.primary_key])
+    localized = session.identity_map.get(key)
+    if localized is None:
+        localized = mapper.class_manager.new_instance()
+        for name, value in values.iteritems():
+            set_committed_value(localized, name, value)
+        instance_state(localized).key = key
+        localized = session.merge(localized, load=False)
+    return localized
+
+
+class LocalizedCache(object):
+    """ second level cache for translations, shared by all sessions
+    entries are keyed by (localized class, translated_id, locale_id)
+    and hold the column values of the translation, or None if missing
+    they are invalidated when a translation is inserted, updated or
+    deleted, or all at once per class by changing its version, kept in
+    the backend so that the processes sharing it see the change
+    reads of a transaction which wrote translations are only cached once
+    it commits, and invalidations are applied again then
+    """
+
+    def __init__(self, backend=None):
+        if backend is None:
+            backend = LRUCacheBackend()
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def _version_key(self, localized_class):
+        root_name = class_mapper(localized_class).base_mapper.class_.__name__
+        return root_name, '%s:version' % root_name
+
+    def _key(self, localized_class, translated_id, locale_string):
+        # a (translated_id, locale_id) pair is unique in the root table,
+        # so that all the classes of a hierarchy share the same entries
+        root_name, version_key = self._version_key(localized_class)
+        try:
+            version = self.backend[version_key]
+        except KeyError:
+            version = 0
+        return '%s:%s:%s:%s' % (root_name, version, translated_id,
+                                locale_string)
+
+    def lookup(self, session, localized_class, translated_id, locale_string):
+        """ returns the cached translation merged into session,
+        None if it is known not to exist or _MISSING
+        """
+        try:
+            values = self.backend[self._key(localized_class, translated_id,
+                                            locale_string)]
+        except KeyError:
+            self.misses += 1
+            return _MISSING
+        self.hits += 1
+        return _merge_column_values(session, localized_class, values)
+
+    def store(self, localized_class, translated_id, locale_string, localized):
+        """ caches the translation of translated_id for a language,
+        which can be None
+        """
+        self.store_values(localized_class, translated_id, locale_string,
+                          _column_values(localized))
+
+    def store_values(self, localized_class, translated_id, locale_string,
+                     values):
+        """ caches the column values of the translation of translated_id
+        for a language, None if it is missing
+        """
+        self.backend[self._key(localized_class, translated_id,
+                               locale_string)] = values
+
+    def invalidate(self, localized):
+        """ forgets a translation
+        """
+        self.discard(localized.__class__, localized.translated_id,
+                     localized.locale_id)
+
+    def discard(self, localized_class, translated_id, locale_string):
+        """ forgets the translation of translated_id for a language
+        """
+        try:
+            del self.backend[self._key(localized_class, translated_id,
+                                       locale_string)]
+        except KeyError:
+            pass
+
+    def invalidate_class(self, localized_class):
+        """ forgets all translations of a localized class hierarchy
+        """
+        # a new version rather than an increment, which other processes
+        # could make at the same time
+        root_name, version_key = self._version_key(localized_class)
+        self.backend[version_key] = uuid4().hex
+
+    def stats(self):
+        """ returns hits, misses and evictions counters
+        """
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': getattr(self.backend, 'evictions', 0),
+                'size': len(self.backend)}
+
+
+_localized_cache = None
+
+
+def set_localized_cache(cache):
+    """ enables the process-wide translation cache, or disables it if None
+    """
+    global _localized_cache
+    _localized_cache = cache
+
+
+def get_localized_cache():
+    """ returns the process-wide translation cache or None
+    """
+    return _localized_cache
+
+
+def _cached_localized(session, localized_class, translated_id, locale_string):
+    """ looks a translation up in the process-wide cache if enabled
+    """
+    if _localized_cache is None:
+        return _MISSING
+    return _localized_cache.lookup(session, localized_class, translated_id,
+                                   locale_string)
+
+
+# cache writes held until the transaction which wrote translations
+# commits, as (weak reference to the transaction, writes) per session,
+# transactions referring to their session
+_cache_writes = WeakKeyDictionary()
+
+
+def _root_transaction(session):
+    transaction = session.transaction
+    while transaction is not None and transaction._parent is not None:
+        transaction = transaction._parent
+    return transaction
+
+
+def _held_cache_writes(session, wrote=False):
+    """ returns the cache writes held until the transaction of session
+    commits, or None if it wrote no translation; wrote records it did
+    """
+    if session is None:
+        return None
+    session = _real_session(session)
+    transaction = _root_transaction(session)
+    if transaction is None:
+        return None
+    held = _cache_writes.get(session)
+    if held is None or held[0]() is not transaction:
+        if not wrote:
+            return None
+        if localized_cache_session_extension not in session.extensions:
+            session.extensions.append(localized_cache_session_extension)
+        held = _cache_writes[session] = (ref(transaction), [])
+    return held[1]
+
+
+def _cache_localized(session, localized_class, translated_id, locale_string,
+                     localized):
+    """ stores a translation read by session in the process-wide cache
+    if enabled, once committed if its transaction wrote translations
+    """
+    if _localized_cache is None:
+        return
+    args = (localized_class, translated_id, locale_string,
+            _column_values(localized))
+    writes = _held_cache_writes(session)
+    if writes is None:
+        _localized_cache.store_values(*args)
+    else:
+        writes.append(('store_values', args))
+
+
+def _cache_invalidate(session, method, *args):
+    """ records that session wrote translations, and invalidates the
+    process-wide cache for them, right away and again when its transaction
+    commits, other sessions caching the previous values meanwhile
+    """
+    writes = _held_cache_writes(session, wrote=True)
+    if _localized_cache is None:
+        return
+    getattr(_localized_cache, method)(*args)
+    if writes is not None:
+        writes.append((method, args))
+
+
+def _wrote_translations(session):
+    """ tells whether the transaction of session wrote translations,
+    which other connections do not see
+    """
+    return _held_cache_writes(session) is not None
+
+
+class LocalizedCacheExtension(MapperExtension):
+    """ keeps the process-wide cache in sync with translations writes
+    """
+
+    def _invalidate(self, mapper, connection, instance):
+        _cache_invalidate(object_session(instance), 'discard',
+                          type(instance), instance.translated_id,
+                          instance.locale_id)
+        return EXT_CONTINUE
+
+    after_insert = after_update = after_delete = _invalidate
+
+
+localized_cache_extension = LocalizedCacheExtension()
+
+
+class LocalizedCacheSessionExtension(SessionExtension):
+    """ applies the cache writes held for a session when its transaction
+    commits, and forgets them when it is rolled back
+    """
+
+    def after_commit(self, session):
+        transaction = session.transaction
+        if transaction.nested:
+            # a savepoint was released
+            return
+        held = _cache_writes.pop(session, None)
+        if held is not None and held[0]() is transaction and \
+           _localized_cache is not None:
+            for method, args in held[1]:
+                getattr(_localized_cache, method)(*args)
+
+    def after_rollback(self, session):
+        transaction = session.transaction
+        while transaction._parent is not None and not transaction.nested:
+            transaction = transaction._parent
+        if transaction._parent is None:
+            _cache_writes.pop(session, None)
+            return
+        # a savepoint was rolled back, the reads held may reflect it
+        held = _cache_writes.get(session)
+        if held is not None:
+            held[1][:] = [write for write in held[1]
+                          if write[0] != 'store_values']
+
+
+localized_cache_session_extension = LocalizedCacheSessionExtension()
+
+
+#
+# instrumentation
+#
+
+class LocalizedStats(object):
+    """ counters and timings of localized operations, and of the SQL
+    statements issued against the localized tables
+    """
+
+    def __init__(self, max_statements=100):
+        self.max_statements = max_statements
+        self.reset()
+
+    def reset(self):
+        self.counts = {}
+        self.timings = {}
+        self.queries = 0
+        self.statements = []
+
+    def record(self, name, seconds=0):
+        self.counts[name] = self.counts.get(name, 0) + 1
+        self.timings[name] = self.timings.get(name, 0) + seconds
+
+    def record_statement(self, statement, seconds):
+        self.queries += 1
+        if len(self.statements) < self.max_statements:
+            self.statements.append(statement)
+        self.record('sql', seconds)
+
+    def report(self):
+        """ returns the counters and timings as a dict
+        """
+        return {'queries': self.queries,
+                'counts': dict(self.counts),
+                'timings': dict(self.timings)}
+
+
+_localized_stats = None
+# stats per session
+_session_stats = WeakKeyDictionary()
+# the localized tables, to recognize their statements by name
+_localized_tables_registry = []
+_localized_table_names = set()
+# per thread recorders and stats of the running operations
+_instrumented = threading.local()
+# recorders active in all threads
+_active_recorders = 0
+_recorders_lock = threading.Lock()
+# whether any stats are collected, checked first by every hook
+_instrumentation_on = False
+# engines used with localized tables, mapped to their plain and proxied
+# connection classes, the latter only installed while instrumentation is on
+_localized_engines = WeakKeyDictionary()
+
+
+def _update_instrumentation():
+    global _instrumentation_on
+    _instrumentation_on = bool(_localized_stats is not None or _session_stats
+                               or _active_recorders)
+    for table in _localized_tables_registry:
+        if isinstance(table.metadata.bind, Engine):
+            instrument_engine(table.metadata.bind)
+    for engine, classes in _localized_engines.items():
+        if classes is not None:
+            engine.Connection = classes[_instrumentation_on and 1 or 0]
+
+
+def _register_localized_table(table):
+    """ registers a localized table, and the engines it is bound to or
+    created with
+    """
+    _localized_tables_registry.append(table)
+    _localized_table_names.add(table.name)
+    if isinstance(table.metadata.bind, Engine):
+        instrument_engine(table.metadata.bind)
+    table.append_ddl_listener('after-create',
+        lambda event, target, bind: instrument_engine(bind.engine))
+
+
+def _instrument_connections(session):
+    """ makes the connections a session checked out while instrumentation
+    was off report their statements
+    """
+    transaction = session.transaction
+    while transaction is not None:
+        for connection, nested, autoclose in transaction._connections.values():
+            instrument_engine(connection.engine)
+            classes = _localized_engines[connection.engine]
+            if classes is not None and type(connection) is classes[0]:
+                connection.__class__ = classes[1]
+        transaction = transaction._parent
+
+
+def _real_session(session):
+    if isinstance(session, ScopedSession):
+        session = session()
+    return session
+
+
+def set_localized_stats(stats):
+    """ collects the stats of all sessions, or stops if None
+    """
+    global _localized_stats
+    _localized_stats = stats
+    _update_instrumentation()
+
+
+def get_localized_stats():
+    """ returns the stats collected for all sessions, or None
+    """
+    return _localized_stats
+
+
+def set_session_stats(session, stats):
+    """ collects the stats of the operations of a session, or stops if
+    None; statements are counted while an operation runs
+    """
+    session = _real_session(session)
+    if stats is None:
+        _session_stats.pop(session, None)
+    else:
+        _session_stats[session] = stats
+        if isinstance(session.bind, Engine):
+            instrument_engine(session.bind)
+    _update_instrumentation()
+    if stats is not None:
+        _instrument_connections(session)
+
+
+@contextmanager
+def record_localized(stats=None):
+    """ collects the stats of everything done by the thread meanwhile
+    """
+    if stats is None:
+        stats = LocalizedStats()
+    recorders = getattr(_instrumented, 'recorders', None)
+    if recorders is None:
+        recorders = _instrumented.recorders = []
+    recorders.append(stats)
+    _count_recorder(1)
+    try:
+        yield stats
+    finally:
+        recorders.remove(stats)
+        _count_recorder(-1)
+
+
+def _count_recorder(increment):
+    global _active_recorders
+    _recorders_lock.acquire()
+    try:
+        _active_recorders += increment
+        _update_instrumentation()
+    finally:
+        _recorders_lock.release()
+
+
+@contextmanager
+def assert_max_localized_queries(count):
+    """ fails if the block issues more than count statements against
+    the localized tables
+    """
+    with record_localized() as stats:
+        yield stats
+    if stats.queries > count:
+        raise AssertionError, '%d localized queries issued, at most %d ' \
+              'expected:\n%s' % (stats.queries, count,
+                                 '\n'.join(stats.statements))
+
+
+def _stats_targets(session=None):
+    """ returns the stats collecting for the current thread and session
+    """
+    targets = list(getattr(_instrumented, 'recorders', None) or ())
+    if _localized_stats is not None:
+        targets.append(_localized_stats)
+    stats = None
+    if session is not None:
+        stats = _session_stats.get(session)
+    else:
+        operations = getattr(_instrumented, 'operations', None)
+        if operations:
+            stats = operations[-1]
+    if stats is not None:
+        targets.append(stats)
+    return targets
+
+
+def _instrument(name, function):
+    """ wraps a localized operation so that its calls are counted and
+    timed when instrumentation is on
+    """
+    def instrumented(self, *args, **kw):
+        if not _instrumentation_on:
+            return function(self, *args, **kw)
+        if isinstance(self, type):
+            session = _real_session(self.query.session)
+        else:
+            session = object_session(self)
+        if session is not None:
+            _instrument_connections(session)
+        targets = _stats_targets(session)
+        operations = getattr(_instrumented, 'operations', None)
+        if operations is None:
+            operations = _instrumented.operations = []
+        # operations called by another one are part of it
+        outermost = not operations
+        # statements of the operation count for its session
+        operations.append(session is not None and
+                          _session_stats.get(session) or None)
+        start = time()
+        try:
+            return function(self, *args, **kw)
+        finally:
+            elapsed = time() - start
+            operations.pop()
+            if outermost:
+                for target in targets:
+                    target.record(name, elapsed)
+    instrumented.__name__ = function.__name__
+    instrumented.__doc__ = function.__doc__
+    return instrumented
+
+
+def _setup_phase(method):
+    """ wraps a phase of the localized builder so that its time is
+    recorded as setup.<phase> in the process-wide stats, if any
+    """
+    name = 'setup.%s' % method.__name__
+    def timed(self):
+        if _localized_stats is None:
+            return method(self)
+        start = time()
+        try:
+            return method(self)
+        finally:
+            _localized_stats.record(name, time() - start)
+    timed.__name__ = method.__name__
+    timed.__doc__ = method.__doc__
+    return timed
+
+
+class LocalizedConnectionProxy(ConnectionProxy):
+    """ counts and times the statements issued against localized tables
+    """
+
+    def cursor_execute(self, execute, cursor, statement, parameters,
+                       context, executemany):
+        if not _instrumentation_on:
+            return execute(cursor, statement, parameters, context)
+        for name in _localized_table_names:
+            if name in statement:
+                break
+        else:
+            return execute(cursor, statement, parameters, context)
+        start = time()
+        try:
+            return execute(cursor, statement, parameters, context)
+        finally:
+            elapsed = time() - start
+            for target in _stats_targets():
+                target.record_statement(statement, elapsed)
+
+
+localized_connection_proxy = LocalizedConnectionProxy()
+
+
+def instrument_engine(engine):
+    """ makes the connections of an engine opened while instrumentation
+    is on report their statements against localized tables
+    """
+    if engine in _localized_engines:
+        return
+    try:
+        from sqlalchemy.engine.base import _proxy_connection_cls
+    except ImportError:
+        # SQLAlchemy 0.7 and later adapt proxies to events, which stay
+        ConnectionProxy._adapt_listener(engine, localized_connection_proxy)
+        _localized_engines[engine] = None
+        return
+    plain = engine.Connection
+    _localized_engines[engine] = (plain, _proxy_connection_cls(
+                                          plain, localized_connection_proxy))
+    if _instrumentation_on:
+        engine.Connection = _localized_engines[engine][1]
+
+
+#
+# translations loaded in background threads
+#
+
+class LocalizedExecutor(object):
+    """ runs functions in a few daemon threads, any object with a
+    submit(function, *args) method can be used instead, such as a
+    concurrent.futures executor
+    """
+
+    def __init__(self, workers=4):
+        self.workers = workers
+        self._queue = Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def _work(self):
+        while True:
+            function, args = self._queue.get()
+            function(*args)
+
+    def submit(self, function, *args):
+        self._lock.acquire()
+        try:
+            if not self._threads:
+                for i in range(self.workers):
+                    thread = threading.Thread(target=self._work)
+                    thread.setDaemon(True)
+                    thread.start()
+                    self._threads.append(thread)
+        finally:
+            self._lock.release()
+        self._queue.put((function, args))
+
+
+_localized_executor = None
+
+
+def set_localized_executor(executor):
+    """ sets the executor running background loads, the default
+    LocalizedExecutor if None
+    """
+    global _localized_executor
+    _localized_executor = executor
+
+
+def get_localized_executor():
+    """ returns the executor running background loads
+    """
+    global _localized_executor
+    if _localized_executor is None:
+        _localized_executor = LocalizedExecutor()
+    return _localized_executor
+
+
+# loads in flight, keyed by (root localized class, translated_id, locale)
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+class _LocalizedLoad(object):
+    """ background load of the translations of many ids for a language,
+    read in a session of its own and kept as column values
+    """
+
+    def __init__(self, localized_class, ids, locale_string, bind):
+        self.localized_class = localized_class
+        self.ids = ids
+        self.locale_string = locale_string
+        self.bind = bind
+        self.values = {}
+        self.error = None
+        self.event = threading.Event()
+
+    def keys(self):
+        root = class_mapper(self.localized_class).base_mapper.class_
+        return [(root, translated_id, self.locale_string)
+                for translated_id in self.ids]
+
+    def run(self):
+        localized_class = self.localized_class
+        try:
+            session = create_session(bind=self.bind)
+            try:
+                for chunk in _chunks(self.ids, IN_CLAUSE_CHUNK_SIZE):
+                    query = session.query(localized_class).with_polymorphic('*')
+                    query = query.filter(and_(
+                                localized_class.translated_id.in_(chunk),
+                                localized_class.locale_id==self.locale_string))
+                    for localized in query:
+                        self.values[localized.translated_id] = \
+                            _column_values(localized)
+            finally:
+                session.close()
+        except Exception, error:
+            self.error = error
+        _in_flight_lock.acquire()
+        try:
+            for key in self.keys():
+                if _in_flight.get(key) is self:
+                    del _in_flight[key]
+        finally:
+            _in_flight_lock.release()
+        self.event.set()
+
+
+class LocalizedFuture(object):
+    """ pending translation of an entity for a language, the query
+    running in a background thread; result() waits for it and merges the
+    translation into the session of the entity
+    """
+
+    def __init__(self, instance, locale_string, load=None):
+        self.instance = instance
+        self.locale_string = locale_string
+        self._load = load
+        self._resolved = load is None
+
+    def done(self):
+        return self._resolved or self._load.event.isSet()
+
+    def result(self, timeout=None):
+        """ returns the translation, the entity itself for its default
+        language or None, raising the error of the query if any
+        """
+        instance = self.instance
+        if not self._resolved:
+            load = self._load
+            if not load.event.wait(timeout) and not load.event.isSet():
+                raise RuntimeError, 'translation not loaded in %ss' % timeout
+            if load.error is not None:
+                raise load.error
+            session = object_session(instance) or type(instance).query.session
+            # the load did not see what the transaction wrote meanwhile,
+            # the translation is then read again in it
+            if not _wrote_translations(session):
+                localized_class = type(instance).__localized_class__
+                values = load.values.get(instance.id)
+                localized = _merge_column_values(session, localized_class,
+                                                 values)
+                _cache_localized(session, localized_class, instance.id,
+                                 self.locale_string, localized)
+                slot = _localized_slot(instance)
+                if slot.get(self.locale_string, _MISSING) is _MISSING:
+                    slot[self.locale_string] = localized
+            self._resolved = True
+        return instance.get_localized(self.locale_string)
+
+
+class LocalizedManyFuture(object):
+    """ pending translations of many entities for a language
+    """
+
+    def __init__(self, futures):
+        self.futures = futures
+
+    def done(self):
+        for future in self.futures:
+            if not future.done():
+                return False
+        return True
+
+    def result(self, timeout=None):
+        """ returns a dict mapping each entity to its translation
+        """
+        return dict((future.instance, future.result(timeout))
+                    for future in self.futures)
+
+
+def _background_bind(bind):
+    """ tells whether a connection of its own checked out from bind in
+    another thread sees the same database, which is not the case of the
+    SQLite databases in memory, nor of connections shared by threads
+    """
+    if not isinstance(bind, Engine) or isinstance(bind.pool, StaticPool):
+        return False
+    return bind.url.drivername.split('+')[0] != 'sqlite' or \
+           bind.url.database not in (None, '', ':memory:')
+
+
+def _submit_localized(instances, locale_string):
+    """ returns futures of the translations of instances for a language,
+    sharing the loads already in flight and starting one for the others
+    """
+    futures = []
+    pending = []
+    for instance in instances:
+        localized_class = type(instance).__localized_class__
+        if _localized_slot(instance).get(locale_string, _MISSING) \
+           is not _MISSING:
+            futures.append(LocalizedFuture(instance, locale_string))
+            continue
+        session = object_session(instance) or type(instance).query.session
+        cached = _cached_localized(session, localized_class, instance.id,
+                                   locale_string)
+        if cached is not _MISSING:
+            _localized_slot(instance)[locale_string] = cached
+            futures.append(LocalizedFuture(instance, locale_string))
+            continue
+        pending.append(instance)
+    if not pending:
+        return futures
+    # the root localized class loads the translations of all the entities
+    localized_class = class_mapper(
+            type(pending[0]).__localized_class__).base_mapper.class_
+    session = object_session(pending[0]) or type(pending[0]).query.session
+    bind = session.get_bind(class_mapper(localized_class))
+    if not _background_bind(bind) or _wrote_translations(session):
+        # another connection would not see the same database
+        entity = class_mapper(type(pending[0])).base_mapper.class_
+        entity.localize_many(pending, locale_string)
+        futures.extend(LocalizedFuture(instance, locale_string)
+                       for instance in pending)
+        return futures
+    load = _LocalizedLoad(localized_class, [], locale_string, bind)
+    _in_flight_lock.acquire()
+    try:
+        for instance in pending:
+            key = (localized_class, instance.id, locale_string)
+            current = _in_flight.get(key)
+            if current is None:
+                current = _in_flight[key] = load
+                load.ids.append(instance.id)
+            futures.append(LocalizedFuture(instance, locale_string, current))
+    finally:
+        _in_flight_lock.release()
+    if load.ids:
+        get_localized_executor().submit(load.run)
+    return futures
+
+
+#
+# request scoped batching of translation lookups
+#
+
+# loaders in use, keyed by session
+_active_loaders = WeakKeyDictionary()
+
+
+def _active_loader(session):
+    """ returns the loader active for a session, or None
+    """
+    if session is None:
+        return None
+    return _active_loaders.get(session)
+
+
+def _root_localized_class(instance):
+    """ returns the root localized class of the hierarchy of an entity
+    """
+    return class_mapper(type(instance).__localized_class__).base_mapper.class_
+
+
+class LocalizedLoader(object):
+    """ batches the translation lookups made while it is active, as a
+    DataLoader would: the entities it knows of, that is the ones loaded
+    in its session meanwhile or queued with load(), get their
+    translations with one IN (...) query as soon as one of them is
+    looked up by get_localized, and results are kept until the
+    transaction of its session ends
+    """
+
+    def __init__(self, session):
+        if isinstance(session, ScopedSession):
+            session = session()
+        self.session = session
+        self.queries = 0
+        self._instances = {}
+        self._locales = {}
+        self._results = {}
+
+    def __enter__(self):
+        self.activate()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.deactivate()
+
+    def activate(self):
+        """ makes get_localized use this loader
+        """
+        _active_loaders[self.session] = self
+        if localized_loader_session_extension not in self.session.extensions:
+            self.session.extensions.append(localized_loader_session_extension)
+
+    def deactivate(self):
+        """ makes get_localized query alone again
+        """
+        if _active_loaders.get(self.session) is self:
+            del _active_loaders[self.session]
+
+    def clear(self):
+        """ forgets the entities and the translations known so far
+        """
+        self._instances.clear()
+        self._locales.clear()
+        self._results.clear()
+
+    def register(self, instance):
+        """ makes an entity part of the next batches
+        """
+        self._instances.setdefault(_root_localized_class(instance),
+                                   {})[instance.id] = instance
+
+    def load(self, instance, locale_string):
+        """ queues the lookup of a translation, made along with the next
+        one needing a query
+        """
+        self.register(instance)
+        self._locales.setdefault(_root_localized_class(instance),
+                                 set()).add(locale_string)
+
+    def get(self, instance, locale_string):
+        """ returns the translation of an entity for a language or None,
+        querying the translations of all the entities known, for all the
+        languages asked so far, if unknown
+        """
+        root = _root_localized_class(instance)
+        key = (root, instance.id, locale_string)
+        localized = self._results.get(key, _MISSING)
+        if localized is not _MISSING:
+            if localized is None or self._usable(localized):
+                return localized
+            del self._results[key]
+        localized = _cached_localized(self.session, root, instance.id,
+                                      locale_string)
+        if localized is not _MISSING:
+            self._results[key] = localized
+            return localized
+        self.load(instance, locale_string)
+        self.dispatch(root)
+        return self._results[key]
+
+    def _usable(self, localized):
+        """ tells if a translation kept is still attached to the session,
+        and neither expired nor deleted
+        """
+        return object_session(localized) is self.session and \
+               not instance_state(localized).expired and _is_live(localized)
+
+    def remember(self, instance, locale_string, localized):
+        """ records the translation of an entity added in a language
+        """
+        key = (_root_localized_class(instance), instance.id, locale_string)
+        self._results[key] = localized
+
+    def forget(self, root, locale_string, ids):
+        """ records that the translations of ids in a language of a
+        hierarchy were deleted
+        """
+        for translated_id in ids:
+            key = (root, translated_id, locale_string)
+            if key in self._results:
+                self._results[key] = None
+
+    def dispatch(self, root):
+        """ queries the unknown translations of the entities of a
+        hierarchy with one IN (...) query per chunk of ids
+        """
+        instances = self._instances.get(root, {})
+        locale_strings = set()
+        ids = []
+        for translated_id in instances:
+            unknown = [locale_string for locale_string in self._locales[root]
+                       if (root, translated_id, locale_string)
+                       not in self._results]
+            if unknown:
+                ids.append(translated_id)
+                locale_strings.update(unknown)
+        if not ids:
+            return
+        locale_strings = sorted(locale_strings)
+        found = {}
+        for chunk in _chunks(ids, IN_CLAUSE_CHUNK_SIZE):
+            # load subclasses columns in the same SELECT
+            query = self.session.query(root).with_polymorphic('*')
+            query = query.filter(and_(root.translated_id.in_(chunk),
+                                      root.locale_id.in_(locale_strings)))
+            self.queries += 1
+            for localized in query:
+                found[localized.translated_id, localized.locale_id] = localized
+        for translated_id in ids:
+            slot = _localized_slot(instances[translated_id])
+            for locale_string in locale_strings:
+                key = (root, translated_id, locale_string)
+                if key in self._results:
+                    continue
+                localized = found.get((translated_id, locale_string))
+                self._results[key] = localized
+                _cache_localized(self.session, root, translated_id,
+                                 locale_string, localized)
+                if slot.get(locale_string, _MISSING) is _MISSING:
+                    slot[locale_string] = localized
+
+
+class LocalizedLoaderSessionExtension(SessionExtension):
+    """ makes the loader active for a session forget the translations
+    it knows of when its transaction ends, as they are expired or gone
+    """
+
+    def after_commit(self, session):
+        if session.transaction.nested:
+            # a savepoint was released
+            return
+        self._clear(session)
+
+    def after_rollback(self, session):
+        self._clear(session)
+
+    def _clear(self, session):
+        loader = _active_loaders.get(session)
+        if loader is not None:
+            loader._results.clear()
+
+
+localized_loader_session_extension = LocalizedLoaderSessionExtension()
+
+
+#
+# attributes of the Localized classes read from the translated entity
+#
+
+def _record_translated_read(translated):
+    """ counts a read of a translation falling back to its entity
+    """
+    session = None
+    if translated is not None:
+        session = object_session(translated)
+    for target in _stats_targets(session):
+        target.record('get_localized_attr')
+
+
+class TranslatedAttribute(object):
+    """ descriptor reading an attribute (method, property, class attribute)
+    of the entity a translation belongs to
+    """
+
+    def __init__(self, name, translated_name):
+        self.name = name
+        self.translated_name = translated_name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        translated = getattr(instance, self.translated_name)
+        if _instrumentation_on:
+            _record_translated_read(translated)
+        return getattr(translated, self.name)
+
+
+class TranslatedColumn(TranslatedAttribute):
+    """ descriptor reading and writing a non localized column
+    of the entity a translation belongs to
+    """
+
+    def __set__(self, instance, value):
+        setattr(getattr(instance, self.translated_name), self.name, value)
+
+
+def _localized_init(self, **kw):
+    self.__dict__.update(kw)
+
+
+def _localized_repr(self):
+    return '<%r %r, id: %r for: %r>' \
+       % (self.__class__.__name__, self.locale_id,
+          self.translated_id, self.__localized_entity__)
+
+
+def _implements_entity(localized_class, entity):
+    """ makes a localized class provide the interfaces of its entity,
+    skipping the declaration when none was ever made for it
+    """
+    if getattr(entity, '__implemented__', None) is not None:
+        classImplements(localized_class, implementedBy(entity))
+
+
+def _install_translated_columns(localized_class, excluded=()):
+    """ adds a descriptor on the localized class for every non localized
+    column of the entity which it does not define itself, so that they
+    are written through; the other attributes of the entity get theirs
+    at first access, from get_localized_attr
+    """
+    translated_name = localized_class.__localized_translated__
+    for name in localized_class.__not_localized_fields__:
+        if name.startswith('_') or name in excluded \
+           or hasattr(localized_class, name):
+            continue
+        setattr(localized_class, name, TranslatedColumn(name, translated_name))
+
+
+def get_localized_attr(self, attr):
+    """ will return the 'translated' attribute for attributes
+    not known when the Localized class was built, as this will replace
+    the __getattr__ for the Localized class
+    attributes of the entity class (methods, properties, relations...)
+    get a descriptor on the localized class, so that next reads are
+    plain lookups
+    """
+    if attr.startswith('_'):
+        raise AttributeError, attr
+    localized_class = type(self)
+    translated_name = localized_class.__localized_translated__
+    if hasattr(localized_class.__localized_entity__, attr):
+        setattr(localized_class, attr,
+                TranslatedAttribute(attr, translated_name))
+    translated = getattr(self, translated_name)
+    if _instrumentation_on:
+        _record_translated_read(translated)
+    return getattr(translated, attr)
+
+
+#
+# bulk writes and reads of the localized tables
+#
+
+# columns of the localized tables which are not localized fields
+_LOCALIZED_KEYS = ('translated_id', 'locale_id', 'translated_type',
+                   UPDATED_COLUMN)
+
+
+def _localized_tables(localized_class):
+    """ returns the localized tables of a localized class, root first
+    """
+    tables = []
+    mapper = class_mapper(localized_class)
+    while mapper is not None:
+        if mapper.local_table not in tables:
+            tables.insert(0, mapper.local_table)
+        mapper = mapper.inherits
+    return tables
+
+
+def _localized_classes(session, entity, ids):
+    """ returns a dict mapping ids to the localized class of the actual
+    (maybe polymorphic) type of the entity they identify
+    """
+    entity_mapper = class_mapper(entity)
+    pk = entity_mapper.primary_key[0]
+    discriminator = entity_mapper.polymorphic_on
+    columns = [pk]
+    if discriminator is not None:
+        columns.append(discriminator)
+    classes = {}
+    for chunk in _chunks(ids, IN_CLAUSE_CHUNK_SIZE):
+        for row in session.execute(select(columns, pk.in_(chunk))):
+            class_ = entity
+            if discriminator is not None:
+                class_ = entity_mapper.polymorphic_map[row[1]].class_
+            classes[row[0]] = class_.__localized_class__
+    return classes
+
+
+def _write_translations(session, entity, records, upsert):
+    """ inserts (or updates if upsert and they exist) a batch of
+    (id, locale, fields) records using one executemany per table
+    """
+    # the fields of a translation may be given by several records
+    merged = {}
+    order = []
+    for translated_id, locale_string, fields in records:
+        key = (translated_id, locale_string)
+        if key not in merged:
+            merged[key] = {}
+            order.append(key)
+        merged[key].update(fields)
+    records = [key + (merged[key], ) for key in order]
+    ids = set(record[0] for record in records)
+    classes = _localized_classes(session, entity, ids)
+    existing = set()
+    if upsert:
+        root = _localized_tables(entity.__localized_class__)[0]
+        for chunk in _chunks(ids, IN_CLAUSE_CHUNK_SIZE):
+            existing.update((row[0], row[1]) for row in session.execute(
+                    select([root.c.translated_id, root.c.locale_id],
+                           root.c.translated_id.in_(chunk))))
+
+    depths = {}
+    inserts = {}
+    updates = {}
+    now = datetime.now()
+    for translated_id, locale_string, fields in records:
+        try:
+            localized_class = classes[translated_id]
+        except KeyError:
+            raise ValueError, 'no %s with id %r' % (entity.__name__,
+                                                    translated_id)
+        is_update = (translated_id, locale_string) in existing
+        for depth, table in enumerate(_localized_tables(localized_class)):
+            depths[table] = depth
+            if is_update:
+                values = dict((column.name, fields[column.name])
+                              for column in table.c
+                              if column.name in fields)
+                if UPDATED_COLUMN in table.c:
+                    # fields of subclass tables change the root stamp too
+                    values[UPDATED_COLUMN] = now
+                if values:
+                    values['b_translated_id'] = translated_id
+                    values['b_locale_id'] = locale_string
+                    keys = frozenset(values)
+                    updates.setdefault((table, keys), []).append(values)
+            else:
+                values = dict((column.name, fields.get(column.name))
+                              for column in table.c
+                              if column.name != UPDATED_COLUMN)
+                values['translated_id'] = translated_id
+                values['locale_id'] = locale_string
+                if depth == 0:
+                    values['translated_type'] = \
+                        class_mapper(localized_class).polymorphic_identity
+                inserts.setdefault(table, []).append(values)
+
+    # parent rows must exist before their children
+    for table in sorted(inserts, key=depths.get):
+        session.execute(table.insert(), inserts[table])
+    for (table, keys), values in updates.iteritems():
+        statement = table.update(and_(
+                        table.c.translated_id==bindparam('b_translated_id'),
+                        table.c.locale_id==bindparam('b_locale_id')))
+        session.execute(statement, values)
+    if entity.__localized_search__ is not None:
+        _reindex_translations(session, entity,
+                              set((record[0], record[1]) for record in records))
+
+
+def _read_translations(session, localized_class, locale_strings, batch_size):
+    """ yields (id, locale, fields) records for all the translations of a
+    localized class and its subclasses, each with the fields of its own
+    class, fetching batch_size rows at a time
+    """
+    localized_mapper = class_mapper(localized_class)
+    mappers = list(localized_mapper.polymorphic_iterator())
+    tables = _localized_tables(localized_class)
+    root = tables[0]
+    from_obj = localized_mapper.mapped_table
+    # the tables of the subclasses are outer joined, as with_polymorphic
+    for sub_mapper in mappers:
+        table = sub_mapper.local_table
+        if table not in tables:
+            tables.append(table)
+            from_obj = from_obj.outerjoin(table, and_(
+                            table.c.translated_id==root.c.translated_id,
+                            table.c.locale_id==root.c.locale_id))
+    columns = [root.c.translated_id, root.c.locale_id, root.c.translated_type]
+    for table in tables:
+        columns.extend(column for column in table.c
+                       if column.name not in _LOCALIZED_KEYS)
+    names = [column.name for column in columns[3:]]
+    # the fields of each class, by position in the rows
+    fields = {}
+    for sub_mapper in mappers:
+        own = _all_localized_fields(sub_mapper.class_.__localized_entity__)
+        fields[sub_mapper.polymorphic_identity] = \
+                [(index + 3, name) for index, name in enumerate(names)
+                 if name in own]
+    query = select(columns, from_obj=[from_obj])
+    if localized_mapper.inherits is not None:
+        # single table subclasses share the table of their parent
+        query = query.where(root.c.translated_type.in_(fields.keys()))
+    if locale_strings is not None:
+        query = query.where(root.c.locale_id.in_(locale_strings))
+    query = query.order_by(root.c.translated_id, root.c.locale_id)
+    result = session.execute(query)
+    while True:
+        rows = result.fetchmany(batch_size)
+        if not rows:
+            break
+        for row in rows:
+            yield row[0], row[1], dict((name, row[index])
+                                       for index, name in fields[row[2]])
+
+
+def _walk_session(entity):
+    """ returns a session of its own, sharing the connection (and the
+    transaction) of the session of entity, to load objects which are
+    never attached to the latter
+    """
+    session = entity.query.session
+    return create_session(bind=session.connection(mapper=class_mapper(entity)))
+
+
+def _set_translated(localized, instance):
+    """ links a translation to its entity without loading anything,
+    through the relations of all its localized classes
+    """
+    for localized_mapper in object_mapper(localized).iterate_to_root():
+        relation_name = localized_mapper.class_.__dict__.get(
+                            '__localized_translated__')
+        if relation_name is not None:
+            set_committed_value(localized, relation_name, instance)
+
+
+def _iter_localized(entity, locale_string, chunk_size):
+    """ yields (entity, translation) pairs for a language, chunk_size at
+    a time, paginating on (translated_id, locale_id) rather than with
+    OFFSET, the objects of each chunk being dropped once done
+    """
+    walk = _walk_session(entity)
+    localized_class = entity.__localized_class__
+    last_id = None
+    while True:
+        # load subclasses columns in the same SELECT
+        query = walk.query(localized_class).with_polymorphic('*')
+        query = query.filter(localized_class.locale_id==locale_string)
+        if last_id is not None:
+            query = query.filter(localized_class.translated_id > last_id)
+        query = query.order_by(localized_class.translated_id,
+                               localized_class.locale_id)
+        translations = query.limit(chunk_size).all()
+        if not translations:
+            break
+        ids = [localized.translated_id for localized in translations]
+        last_id = ids[-1]
+        query = walk.query(entity).with_polymorphic('*')
+        instances = dict((instance.id, instance)
+                         for instance in query.filter(entity.id.in_(ids)))
+        for localized in translations:
+            instance = instances[localized.translated_id]
+            _set_translated(localized, instance)
+            _localized_slot(instance)[locale_string] = localized
+            yield instance, localized
+        walk.expunge_all()
+
+
+def _hierarchy_tables(localized_class):
+    """ returns the localized tables of a localized class, of its parents
+    and of its subclasses, children first
+    """
+    depths = {}
+    for localized_mapper in class_mapper(localized_class).polymorphic_iterator():
+        for depth, table in enumerate(_localized_tables(localized_mapper.class_)):
+            depths[table] = depth
+    return sorted(depths, key=depths.get, reverse=True)
+
+
+def _delete_translations(session, tables, ids, locale_string):
+    """ deletes the rows of the translations of ids in a language,
+    from the localized tables given children first
+    """
+    for chunk in _chunks(ids, IN_CLAUSE_CHUNK_SIZE):
+        for table in tables:
+            session.execute(table.delete(and_(
+                                table.c.translated_id.in_(chunk),
+                                table.c.locale_id==locale_string)))
+
+
+def _drop_versions(instance, locale_string):
+    """ removes the translations in a language from the loaded versions
+    collections of an entity, without recording any change
+    """
+    for entity_mapper in object_mapper(instance).iterate_to_root():
+        relation_name = '%s_localized_versions' % entity_mapper.class_.__name__
+        versions = instance.__dict__.get(relation_name)
+        if versions is not None:
+            set_committed_value(instance, relation_name,
+                                [version for version in versions
+                                 if version.locale_id != locale_string])
+
+
+def _forget_localized(session, instance, locale_string):
+    """ drops the translation of an entity for a language, deleted with
+    direct statements, from memory: its slot and versions, the session,
+    the loader and the process-wide cache
+    """
+    slot = _localized_slot(instance)
+    candidates = [slot.get(locale_string)]
+    slot[locale_string] = None
+    _drop_versions(instance, locale_string)
+    if instance.id is not None:
+        root = _root_localized_class(instance)
+        key = class_mapper(root).identity_key_from_primary_key(
+                                                [instance.id, locale_string])
+        if session is not None:
+            candidates.append(session.identity_map.get(key))
+            loader = _active_loader(session)
+            if loader is not None:
+                loader.forget(root, locale_string, [instance.id])
+        _cache_invalidate(session, 'discard', root, instance.id,
+                          locale_string)
+    for localized in candidates:
+        if localized is not None and localized is not _MISSING \
+           and session is not None and localized in session:
+            session.expunge(localized)
+
+
+def _forget_locale(session, entity, locale_string, ids):
+    """ drops the translations in a language of ids, deleted with
+    direct statements, from the entities and the session, the loader
+    and the process-wide cache
+    """
+    root = class_mapper(entity.__localized_class__).base_mapper.class_
+    for state in list(session.identity_map.all_states()):
+        instance = state.obj()
+        if instance is None:
+            continue
+        if isinstance(instance, root):
+            translated_id, locale_id = state.key[1]
+            if locale_id == locale_string and translated_id in ids:
+                session.expunge(instance)
+        elif isinstance(instance, entity) and state.key[1][0] in ids:
+            _localized_slot(instance)[locale_string] = None
+            _drop_versions(instance, locale_string)
+    loader = _active_loader(session)
+    if loader is not None:
+        loader.forget(root, locale_string, ids)
+    _cache_invalidate(session, 'invalidate_class', root)
+
+
+def _purge_locale(entity, locale_string, batch_size):
+    """ deletes the translations in a language of the entities of a
+    class, selecting and deleting batch_size of them at a time
+    """
+    session = entity.query.session
+    session.flush()
+    tables = _hierarchy_tables(entity.__localized_class__)
+    if class_mapper(entity).inherits is None:
+        root = tables[-1]
+        query = select([root.c.translated_id], root.c.locale_id==locale_string)
+    else:
+        # only the translations of the entities of the subclass
+        join, root = _translated_join(entity)
+        query = select([root.c.translated_id], root.c.locale_id==locale_string,
+                       from_obj=[join])
+    backend = entity.__localized_search__
+    purged = set()
+    while True:
+        ids = [row[0] for row in session.execute(query.limit(batch_size))]
+        if not ids:
+            break
+        _delete_translations(session, tables, ids, locale_string)
+        if backend is not None:
+            backend.remove(_search_connection(entity), entity, ids,
+                           locale_string)
+        purged.update(ids)
+    _forget_locale(session, entity, locale_string, purged)
+    return len(purged)
+
+
+# record types of the localized_rows projections, keyed by fields
+_row_classes = {}
+
+
+def _row_class(fields):
+    """ returns the read-only, tuple based record type of a projection
+    """
+    try:
+        return _row_classes[fields]
+    except KeyError:
+        row_class = _row_classes[fields] = namedtuple('LocalizedRow', fields)
+        return row_class
+
+
+def _row_fields(entity, fields):
+    """ returns the fields of a projection as a tuple, defaulting to
+    all the columns of the entity
+    """
+    if fields is None:
+        fields = [prop.key for prop in class_mapper(entity).iterate_properties
+                  if isinstance(prop, ColumnProperty)
+                  and prop.key != JSON_COLUMN]
+    return tuple(fields)
+
+
+def _column_property(mapper, name):
+    """ returns the column of a column property of a mapper
+    """
+    prop = mapper.get_property(name, raiseerr=False)
+    if not isinstance(prop, ColumnProperty):
+        raise ValueError, '%r is not a column of %s' % (name,
+                                                        mapper.class_.__name__)
+    return prop.columns[0]
+
+
+def _read_localized_rows(session, entity, locale_string, fields, batch_size):
+    """ yields records merging the entity and its translation for a
+    language, selected with one join and fetched batch_size rows at a time
+    """
+    fields = _row_fields(entity, fields)
+    row_class = _row_class(fields)
+    entity_mapper = class_mapper(entity)
+    localized_class = entity.__localized_class__
+    localized_mapper = class_mapper(localized_class)
+    localized_names = set(_all_localized_fields(entity))
+    localized_names.update(_LOCALIZED_KEYS)
+    columns = []
+    for name in fields:
+        if name in localized_names:
+            columns.append(_column_property(localized_mapper, name))
+        else:
+            columns.append(_column_property(entity_mapper, name))
+    pk = entity_mapper.primary_key[0]
+    root = _localized_tables(localized_class)[0]
+    from_obj = entity_mapper.mapped_table.join(localized_mapper.mapped_table,
+                    and_(root.c.translated_id==pk,
+                         root.c.locale_id==locale_string))
+    query = select(columns, from_obj=[from_obj], use_labels=True)
+    result = session.execute(query.order_by(pk))
+    while True:
+        rows = result.fetchmany(batch_size)
+        if not rows:
+            break
+        for row in rows:
+            yield row_class._make(row)
+
+
+def _pivot_fields(entity, locale_strings, fields):
+    """ returns the localized fields of a pivot, defaulting to all those
+    of the entity, and the names of its record fields, id and then
+    <field>_<locale> for each field and language
+    """
+    localized_names = _all_localized_fields(entity)
+    if fields is None:
+        fields = localized_names
+    for name in fields:
+        if name not in localized_names:
+            raise ValueError, '%r is not a localized field of %s' % (
+                                                    name, entity.__name__)
+    names = ['id']
+    for name in fields:
+        names.extend('%s_%s' % (name, re.sub(r'\W', '_', locale_string))
+                     for locale_string in locale_strings)
+    return tuple(fields), tuple(names)
+
+
+def _pivot_ids(entity, query):
+    """ returns the criterion restricting a pivot to the entities of a
+    query on entity, if any
+    """
+    if query is None:
+        return None
+    return class_mapper(entity).primary_key[0].in_(
+                query.with_entities(entity.id).statement)
+
+
+def _read_pivot_rows(session, entity, locale_strings, fields, query,
+                     batch_size):
+    """ yields records of the values of localized fields in several
+    languages per entity, selected with one LEFT OUTER JOIN per language
+    and localized table on their primary key, batch_size rows at a time
+    """
+    fields, names = _pivot_fields(entity, locale_strings, fields)
+    row_class = _row_class(names)
+    entity_mapper = class_mapper(entity)
+    localized_mapper = class_mapper(entity.__localized_class__)
+    pk = entity_mapper.primary_key[0]
+    default_locale = _column_property(entity_mapper, 'default_locale')
+    from_obj = entity_mapper.mapped_table
+    # the localized tables holding the fields, one alias per language
+    aliases = {}
+    for index, locale_string in enumerate(locale_strings):
+        for name in fields:
+            table = _column_property(localized_mapper, name).table
+            if (table, locale_string) not in aliases:
+                alias = table.alias('%s_%d' % (table.name, index))
+                from_obj = from_obj.outerjoin(alias,
+                                and_(alias.c.translated_id==pk,
+                                     alias.c.locale_id==locale_string))
+                aliases[table, locale_string] = alias
+    columns = [pk]
+    for name in fields:
+        column = _column_property(entity_mapper, name)
+        table = _column_property(localized_mapper, name).table
+        for locale_string in locale_strings:
+            # the entity holds the fields of its default language
+            alias = aliases[table, locale_string]
+            columns.append(case([(default_locale==locale_string, column)],
+                                else_=alias.c[name]))
+    query = select(columns, _pivot_ids(entity, query),
+                   from_obj=[from_obj], use_labels=True)
+    result = session.execute(query.order_by(pk))
+    while True:
+        rows = result.fetchmany(batch_size)
+        if not rows:
+            break
+        for row in rows:
+            yield row_class._make(row)
+
+
+#
+# json storage
+#
+
+# name of the column holding the translations with the json storage
+JSON_COLUMN = 'localized_data'
+
+
+class JSONEncodedDict(TypeDecorator):
+    """ dict stored as a JSON string, never to be changed in place
+    """
+    impl = Text
+
+    def process_bind_param(self, value, dialect):
+        if value is not None:
+            value = json.dumps(value)
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is not None:
+            value = json.loads(value)
+        return value
+
+
+def _json_data(instance):
+    """ returns the translations of an entity, keyed by language
+    """
+    return getattr(instance, JSON_COLUMN) or {}
+
+
+def _set_json_fields(instance, locale_string, fields, replace=False):
+    """ sets localized fields of an entity for a language,
+    assigning a new dict so that the change gets flushed
+    """
+    data = dict(_json_data(instance))
+    if replace:
+        translation = {}
+    else:
+        translation = dict(data.get(locale_string, {}))
+    translation.update(fields)
+    data[locale_string] = translation
+    setattr(instance, JSON_COLUMN, data)
+
+
+class LocalizedJsonField(object):
+    """ descriptor of a localized field of a LocalizedView
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        translation = _json_data(instance.translated).get(instance.locale_id)
+        return (translation or {}).get(self.name)
+
+    def __set__(self, instance, value):
+        _set_json_fields(instance.translated, instance.locale_id,
+                         {self.name: value})
+
+
+class LocalizedView(object):
+    """ translation of an entity using the json storage, reading its
+    localized fields from the json column and everything else from
+    the entity
+    """
+    __slots__ = ('translated', 'locale_id')
+    __localized_fields__ = ()
+    __not_localized_fields__ = ()
+    __localized_translated__ = 'translated'
+
+    def __init__(self, translated, locale_id):
+        self.translated = translated
+        self.locale_id = locale_id
+
+    @property
+    def translated_id(self):
+        return self.translated.id
+
+    def __getattr__(self, attr):
+        return get_localized_attr(self, attr)
+
+    def __repr__(self):
+        return '<%r %r, id: %r for: %r>' \
+               % (self.__class__.__name__, self.locale_id,
+                  self.translated_id, self.__localized_entity__)
+
+
+def _write_json_translations(session, entity, records, upsert):
+    """ merges a batch of (id, locale, fields) records into the json
+    column, using one select and one executemany
+    """
+    entity_mapper = class_mapper(entity)
+    pk = entity_mapper.primary_key[0]
+    table = entity_mapper.base_mapper.local_table
+    column = table.c[JSON_COLUMN]
+    data = {}
+    for chunk in _chunks(set(record[0] for record in records),
+                         IN_CLAUSE_CHUNK_SIZE):
+        for row in session.execute(select([pk, column], pk.in_(chunk))):
+            data[row[0]] = dict(row[1] or {})
+    for translated_id, locale_string, fields in records:
+        try:
+            translations = data[translated_id]
+        except KeyError:
+            raise ValueError, 'no %s with id %r' % (entity.__name__,
+                                                    translated_id)
+        translation = {}
+        if locale_string in translations:
+            if not upsert:
+                raise ValueError, '%s %r is already translated in %r' % (
+                                  entity.__name__, translated_id, locale_string)
+            translation.update(translations[locale_string])
+        translation.update(fields)
+        translations[locale_string] = translation
+    statement = table.update(pk==bindparam('b_id')).values(
+                    {JSON_COLUMN: bindparam('b_data', type_=column.type)})
+    session.execute(statement, [{'b_id': translated_id, 'b_data': values}
+                                for translated_id, values in data.iteritems()])
+
+
+def _read_json_translations(session, entity, locale_strings, batch_size):
+    """ yields (id, locale, fields) records from the json column,
+    fetching batch_size rows at a time
+    """
+    entity_mapper = class_mapper(entity)
+    pk = entity_mapper.primary_key[0]
+    column = entity_mapper.base_mapper.local_table.c[JSON_COLUMN]
+    query = select([pk, column], from_obj=[entity_mapper.mapped_table])
+    result = session.execute(query.order_by(pk))
+    while True:
+        rows = result.fetchmany(batch_size)
+        if not rows:
+            break
+        for translated_id, translations in rows:
+            for locale_string in sorted(translations or {}):
+                if locale_strings is None or locale_string in locale_strings:
+                    yield (translated_id, locale_string,
+                           dict(translations[locale_string]))
+
+
+def _iter_json_localized(entity, locale_string, chunk_size):
+    """ yields (entity, translation) pairs for a language read from the
+    json column, paginating on the entity id chunk_size rows at a time
+    """
+    walk = _walk_session(entity)
+    column = class_mapper(entity).base_mapper.local_table.c[JSON_COLUMN]
+    last_id = None
+    while True:
+        query = walk.query(entity).with_polymorphic('*')
+        # rough filter on the json text, the keys being checked below
+        query = query.filter(column.like(literal('%%"%s":%%' % locale_string,
+                                                 Text)))
+        if last_id is not None:
+            query = query.filter(entity.id > last_id)
+        instances = query.order_by(entity.id).limit(chunk_size).all()
+        if not instances:
+            break
+        last_id = instances[-1].id
+        for instance in instances:
+            if locale_string in _json_data(instance):
+                yield instance, instance.get_localized(locale_string)
+        walk.expunge_all()
+
+
+def _purge_json_locale(entity, locale_string, batch_size):
+    """ removes a language from the json column of the entities of a
+    class, paginating on the entity id batch_size rows at a time, with
+    one executemany per page
+    """
+    session = entity.query.session
+    session.flush()
+    entity_mapper = class_mapper(entity)
+    pk = entity_mapper.primary_key[0]
+    table = entity_mapper.base_mapper.local_table
+    column = table.c[JSON_COLUMN]
+    statement = table.update(pk==bindparam('b_id')).values(
+                    {JSON_COLUMN: bindparam('b_data', type_=column.type)})
+    # rough filter on the json text, the keys being checked below
+    query = select([pk, column],
+                   column.like(literal('%%"%s":%%' % locale_string, Text)),
+                   from_obj=[entity_mapper.mapped_table])
+    count = 0
+    last_id = None
+    while True:
+        page = query
+        if last_id is not None:
+            page = page.where(pk > last_id)
+        rows = session.execute(page.order_by(pk).limit(batch_size)).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        updates = []
+        for translated_id, data in rows:
+            if data and locale_string in data:
+                data = dict(data)
+                del data[locale_string]
+                updates.append({'b_id': translated_id, 'b_data': data})
+        if updates:
+            session.execute(statement, updates)
+            count += len(updates)
+    for state in list(session.identity_map.all_states()):
+        instance = state.obj()
+        if isinstance(instance, entity) and \
+           locale_string in (instance.__dict__.get(JSON_COLUMN) or {}):
+            data = dict(instance.__dict__[JSON_COLUMN])
+            del data[locale_string]
+            set_committed_value(instance, JSON_COLUMN, data)
+            _localized_slot(instance).pop(locale_string, None)
+    return count
+
+
+def _read_json_localized_rows(session, entity, locale_string, fields,
+                              batch_size):
+    """ yields records merging the entity and its translation for a
+    language read from the json column, batch_size rows at a time
+    """
+    fields = _row_fields(entity, fields)
+    row_class = _row_class(fields)
+    entity_mapper = class_mapper(entity)
+    pk = entity_mapper.primary_key[0]
+    json_column = entity_mapper.base_mapper.local_table.c[JSON_COLUMN]
+    localized_names = set(_all_localized_fields(entity))
+    getters = []
+    columns = [pk, json_column]
+    for name in fields:
+        if name == 'translated_id':
+            getters.append((0, None))
+        elif name == 'locale_id':
+            getters.append((None, locale_string))
+        elif name in localized_names:
+            getters.append((1, name))
+        else:
+            column = _column_property(entity_mapper, name)
+            # a column selected twice comes back once
+            indexes = [index for index, selected in enumerate(columns)
+                       if selected is column]
+            if not indexes:
+                columns.append(column)
+                indexes = [len(columns) - 1]
+            getters.append((indexes[0], None))
+    query = select(columns, from_obj=[entity_mapper.mapped_table],
+                   use_labels=True)
+    result = session.execute(query.order_by(pk))
+    while True:
+        rows = result.fetchmany(batch_size)
+        if not rows:
+            break
+        for row in rows:
+            translation = (row[1] or {}).get(locale_string)
+            if translation is None:
+                continue
+            values = []
+            for index, key in getters:
+                if index is None:
+                    values.append(key)
+                elif index == 1:
+                    values.append(translation.get(key))
+                else:
+                    values.append(row[index])
+            yield row_class._make(values)
+
+
+def _read_json_pivot_rows(session, entity, locale_strings, fields, query,
+                          batch_size):
+    """ yields records of the values of localized fields in several
+    languages per entity, read from the json column, batch_size rows at
+    a time
+    """
+    fields, names = _pivot_fields(entity, locale_strings, fields)
+    row_class = _row_class(names)
+    entity_mapper = class_mapper(entity)
+    pk = entity_mapper.primary_key[0]
+    columns = [pk, entity_mapper.base_mapper.local_table.c[JSON_COLUMN],
+               _column_property(entity_mapper, 'default_locale')]
+    columns.extend(_column_property(entity_mapper, name) for name in fields)
+    query = select(columns, _pivot_ids(entity, query),
+                   from_obj=[entity_mapper.mapped_table], use_labels=True)
+    result = session.execute(query.order_by(pk))
+    while True:
+        rows = result.fetchmany(batch_size)
+        if not rows:
+            break
+        for row in rows:
+            data = row[1] or {}
+            values = [row[0]]
+            for index, name in enumerate(fields):
+                for locale_string in locale_strings:
+                    if locale_string == row[2]:
+                        values.append(row[3 + index])
+                    else:
+                        values.append(data.get(locale_string, {}).get(name))
+            yield row_class._make(values)
+
+
+#
+# translation statistics
+#
+
+def _translated_join(entity):
+    """ returns the join of the tables of an entity with the root
+    localized table, and the latter
+    """
+    entity_mapper = class_mapper(entity)
+    root = _localized_tables(entity.__localized_class__)[0]
+    pk = entity_mapper.primary_key[0]
+    return entity_mapper.mapped_table.join(root,
+                                           root.c.translated_id==pk), root
+
+
+def _translation_coverage(session, entity, locale_strings):
+    """ counts the entities available per language, translated or written
+    in it, with one GROUP BY over both, an entity translated in its
+    default language counting once
+    """
+    entity_mapper = class_mapper(entity)
+    join, root = _translated_join(entity)
+    pk = entity_mapper.primary_key[0]
+    default_locale = _column_property(entity_mapper, 'default_locale')
+    locales = union(
+        select([root.c.translated_id.label('id'),
+                root.c.locale_id.label('locale_id')], from_obj=[join]),
+        select([pk.label('id'), default_locale.label('locale_id')],
+               from_obj=[entity_mapper.mapped_table])).alias()
+    query = select([locales.c.locale_id, func.count()],
+                   group_by=[locales.c.locale_id])
+    if locale_strings is not None:
+        query = query.where(locales.c.locale_id.in_(locale_strings))
+    return dict((row[0], row[1]) for row in session.execute(query))
+
+
+def _missing_locales(session, entity, locale_strings):
+    """ lists per language the ids of the entities neither translated nor
+    written in it, with one anti-join per language
+    """
+    entity_mapper = class_mapper(entity)
+    pk = entity_mapper.primary_key[0]
+    root = _localized_tables(entity.__localized_class__)[0]
+    default_locale = _column_property(entity_mapper, 'default_locale')
+    missing = {}
+    for locale_string in locale_strings:
+        translated = exists([root.c.translated_id],
+                            and_(root.c.translated_id==pk,
+                                 root.c.locale_id==locale_string))
+        query = select([pk], and_(default_locale!=locale_string, ~translated),
+                       from_obj=[entity_mapper.mapped_table])
+        missing[locale_string] = [row[0] for row in
+                                  session.execute(query.order_by(pk))]
+    return missing
+
+
+def _stale_translations(session, entity, since, locale_strings):
+    """ lists as (id, locale) the translations older than their entity
+    """
+    if not entity.__localized_timestamps__:
+        raise RuntimeError, '%s does not use the timestamps option' \
+                            % entity.__name__
+    entity_mapper = class_mapper(entity)
+    pk = entity_mapper.primary_key[0]
+    updated = _column_property(entity_mapper, UPDATED_COLUMN)
+    join, root = _translated_join(entity)
+    query = select([pk, root.c.locale_id],
+                   root.c[UPDATED_COLUMN] < updated, from_obj=[join])
+    if since is not None:
+        query = query.where(updated >= since)
+    if locale_strings is not None:
+        query = query.where(root.c.locale_id.in_(locale_strings))
+    query = query.order_by(pk, root.c.locale_id)
+    return [(row[0], row[1]) for row in session.execute(query)]
+
+
+def _read_json_locales(session, entity, batch_size=1000):
+    """ yields the id, default language and translated languages of
+    entities using the json storage
+    """
+    entity_mapper = class_mapper(entity)
+    pk = entity_mapper.primary_key[0]
+    json_column = entity_mapper.base_mapper.local_table.c[JSON_COLUMN]
+    default_locale = _column_property(entity_mapper, 'default_locale')
+    query = select([pk, default_locale, json_column],
+                   from_obj=[entity_mapper.mapped_table], use_labels=True)
+    result = session.execute(query.order_by(pk))
+    while True:
+        rows = result.fetchmany(batch_size)
+        if not rows:
+            break
+        for translated_id, locale_string, translations in rows:
+            yield translated_id, locale_string, translations or {}
+
+
+def _json_translation_coverage(session, entity, locale_strings):
+    """ counts the entities available per language, json storage
+    """
+    coverage = {}
+    for translated_id, default_locale, translations in \
+        _read_json_locales(session, entity):
+        for locale_string in set(translations) | set([default_locale]):
+            if locale_strings is None or locale_string in locale_strings:
+                coverage[locale_string] = coverage.get(locale_string, 0) + 1
+    return coverage
+
+
+def _json_missing_locales(session, entity, locale_strings):
+    """ lists per language the ids of the entities missing it,
+    json storage
+    """
+    missing = dict((locale_string, []) for locale_string in locale_strings)
+    for translated_id, default_locale, translations in \
+        _read_json_locales(session, entity):
+        for locale_string in locale_strings:
+            if locale_string != default_locale and \
+               locale_string not in translations:
+                missing[locale_string].append(translated_id)
+    return missing
+
+
+#
+# translation files
+#
+
+def _parse_id(value):
+    """ ids read from files are integers unless they can't be
+    """
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def read_translations_csv(fileobj, encoding='utf-8'):
+    """ yields (id, locale, fields) records from a csv file having
+    an 'id' and a 'locale' column, every other column being a field
+    empty cells are left out of the fields
+    """
+    for row in csv.DictReader(fileobj):
+        translated_id = _parse_id(row.pop('id'))
+        locale_string = row.pop('locale')
+        fields = dict((name, value.decode(encoding))
+                      for name, value in row.iteritems() if value)
+        yield translated_id, locale_string, fields
+
+
+def write_translations_csv(fileobj, records, fields, encoding='utf-8'):
+    """ writes (id, locale, fields) records to a csv file
+    with an 'id', a 'locale' and a column for every given field
+    """
+    writer = csv.writer(fileobj)
+    writer.writerow(['id', 'locale'] + list(fields))
+    for translated_id, locale_string, values in records:
+        row = [translated_id, locale_string]
+        for name in fields:
+            value = values.get(name)
+            if value is None:
+                value = u''
+            row.append(unicode(value).encode(encoding))
+        writer.writerow(row)
+
+
+def read_translations_json(fileobj):
+    """ yields (id, locale, fields) records from a file holding
+    one {"id": ..., "locale": ..., "fields": {...}} JSON object per line
+    """
+    for line in fileobj:
+        if line.strip():
+            record = json.loads(line)
+            yield record['id'], record['locale'], record['fields']
+
+
+def write_translations_json(fileobj, records):
+    """ writes (id, locale, fields) records to a file, as
+    one {"id": ..., "locale": ..., "fields": {...}} JSON object per line
+    """
+    for translated_id, locale_string, fields in records:
+        fileobj.write(json.dumps({'id': translated_id,
+                                  'locale': locale_string,
+                                  'fields': fields}))
+        fileobj.write('\n')
+
+
+_PO_ESCAPES = [('\\', '\\\\'), ('"', '\\"'), ('\n', '\\n'), ('\t', '\\t')]
+
+
+def _po_quote(value):
+    for char, escaped in _PO_ESCAPES:
+        value = value.replace(char, escaped)
+    return '"%s"' % value
+
+
+def _po_unquote(value):
+    value = value.strip()[1:-1]
+    result = []
+    chars = iter(value)
+    for char in chars:
+        if char == '\\':
+            char = next(chars, '')
+            char = {'n': '\n', 't': '\t'}.get(char, char)
+        result.append(char)
+    return ''.join(result)
+
+
+def _po_entries(fileobj, encoding):
+    """ yields (msgid, msgstr) pairs of a po file
+    """
+    msgid = msgstr = current = None
+    for line in fileobj:
+        line = line.decode(encoding).strip()
+        if line.startswith('msgid '):
+            if msgid is not None:
+                yield msgid, msgstr
+            msgid, msgstr = _po_unquote(line[6:]), u''
+            current = 'msgid'
+        elif line.startswith('msgstr '):
+            msgstr = _po_unquote(line[7:])
+            current = 'msgstr'
+        elif line.startswith('"'):
+            if current == 'msgid':
+                msgid += _po_unquote(line)
+            elif current == 'msgstr':
+                msgstr += _po_unquote(line)
+    if msgid is not None:
+        yield msgid, msgstr
+
+
+def read_translations_po(fileobj, locale_string, encoding='utf-8'):
+    """ yields (id, locale, fields) records from a po file for a language
+    whose msgids are "<id>:<field>", as written by write_translations_po
+    consecutive entries of a same id make a single record, and
+    untranslated entries are left out
+    """
+    record = None
+    for msgid, msgstr in _po_entries(fileobj, encoding):
+        if not msgid or not msgstr:
+            continue
+        translated_id, name = msgid.rsplit(':', 1)
+        translated_id = _parse_id(translated_id)
+        if record is None or record[0] != translated_id:
+            if record is not None:
+                yield record
+            record = (translated_id, locale_string, {})
+        record[2][name] = msgstr
+    if record is not None:
+        yield record
+
+
+def write_translations_po(fileobj, records, locale_string, encoding='utf-8'):
+    """ writes (id, locale, fields) records for a language to a po file,
+    one "<id>:<field>" msgid per field
+    """
+    fileobj.write('msgid ""\nmsgstr ""\n')
+    fileobj.write('"Language: %s\\n"\n' % locale_string)
+    fileobj.write('"Content-Type: text/plain; charset=%s\\n"\n' % encoding)
+    for translated_id, record_locale, fields in records:
+        if record_locale != locale_string:
+            continue
+        for name in sorted(fields):
+            if fields[name] is None:
+                continue
+            entry = u'\nmsgid %s\nmsgstr %s\n' % (
+                        _po_quote(u'%s:%s' % (translated_id, name)),
+                        _po_quote(unicode(fields[name])))
+            fileobj.write(entry.encode(encoding))
+
+
+#
+# full-text search
+#
+
+class LocalizedSearchBackend(object):
+    """ full-text index of the localized fields of a hierarchy of entities,
+    holding one document per translation and one per entity in its default
+    language, implemented by subclasses for a given database
+    """
+
+    def create(self, connection, entity):
+        """ creates the index of the hierarchy of entity
+        """
+        raise NotImplementedError
+
+    def drop(self, connection, entity):
+        """ drops the index of the hierarchy of entity
+        """
+        raise NotImplementedError
+
+    def index(self, connection, entity, documents):
+        """ adds or replaces (translated_id, locale_id, is_default, text)
+        documents, an entity having a single default one whatever its locale
+        """
+        raise NotImplementedError
+
+    def remove(self, connection, entity, ids, locale_string=None):
+        """ removes the translations of ids in a language, or all their
+        documents if locale_string is None
+        """
+        raise NotImplementedError
+
+    def search(self, connection, entity, text, locale_string):
+        """ yields (translated_id, score) pairs, best first, for the
+        documents matching text in a language or, for the entities not
+        translated in it, in their default language; only the default
+        documents are searched if locale_string is None
+        """
+        raise NotImplementedError
+
+
+class SQLiteFTSBackend(LocalizedSearchBackend):
+    """ search backend using an SQLite FTS5 table, <root table>_search,
+    whose rowids are mapped to the keys of the documents by a plain table,
+    <root table>_search_docs; text is an FTS5 query and scores are the
+    opposite of bm25
+    """
+
+    def __init__(self, tokenize='unicode61'):
+        self.tokenize = tokenize
+
+    def _tables(self, entity):
+        root = class_mapper(entity).base_mapper.local_table.name
+        return '%s_search' % root, '%s_search_docs' % root
+
+    def create(self, connection, entity):
+        fts, docs = self._tables(entity)
+        connection.execute('CREATE TABLE IF NOT EXISTS %s ('
+                           'rowid INTEGER PRIMARY KEY, '
+                           'translated_id NOT NULL, '
+                           'locale_id VARCHAR NOT NULL, '
+                           'is_default INTEGER NOT NULL, '
+                           'UNIQUE (translated_id, locale_id, is_default))'
+                           % docs)
+        connection.execute("CREATE VIRTUAL TABLE IF NOT EXISTS %s USING "
+                           "fts5(text, tokenize='%s')"
+                           % (fts, self.tokenize.replace("'", "''")))
+
+    def drop(self, connection, entity):
+        for table in self._tables(entity):
+            connection.execute('DROP TABLE IF EXISTS %s' % table)
+
+    def index(self, connection, entity, documents):
+        fts, docs = self._tables(entity)
+        for translated_id, locale_string, is_default, text in documents:
+            if is_default:
+                rowid = connection.execute(
+                    'SELECT rowid FROM %s WHERE translated_id = ? '
+                    'AND is_default = 1' % docs, (translated_id, )).scalar()
+            else:
+                rowid = connection.execute(
+                    'SELECT rowid FROM %s WHERE translated_id = ? '
+                    'AND locale_id = ? AND is_default = 0' % docs,
+                    (translated_id, locale_string)).scalar()
+            if rowid is None:
+                rowid = connection.execute(
+                    'INSERT INTO %s (translated_id, locale_id, is_default) '
+                    'VALUES (?, ?, ?)' % docs,
+                    (translated_id, locale_string, int(is_default))).lastrowid
+            else:
+                connection.execute('DELETE FROM %s WHERE rowid = ?' % fts,
+                                   (rowid, ))
+                if is_default:
+                    # the default locale of the entity may have changed
+                    connection.execute('UPDATE %s SET locale_id = ? '
+                                       'WHERE rowid = ?' % docs,
+                                       (locale_string, rowid))
+            connection.execute('INSERT INTO %s (rowid, text) VALUES (?, ?)'
+                               % fts, (rowid, text))
+
+    def remove(self, connection, entity, ids, locale_string=None):
+        fts, docs = self._tables(entity)
+        for chunk in _chunks(list(ids), IN_CLAUSE_CHUNK_SIZE):
+            where = 'translated_id IN (%s)' % ', '.join('?' * len(chunk))
+            params = list(chunk)
+            if locale_string is not None:
+                where += ' AND locale_id = ? AND is_default = 0'
+                params.append(locale_string)
+            connection.execute('DELETE FROM %s WHERE rowid IN '
+                               '(SELECT rowid FROM %s WHERE %s)'
+                               % (fts, docs, where), tuple(params))
+            connection.execute('DELETE FROM %s WHERE %s' % (docs, where),
+                               tuple(params))
+
+    def search(self, connection, entity, text, locale_string):
+        fts, docs = self._tables(entity)
+        if locale_string is None:
+            where = 'docs.is_default = 1'
+            params = (text, )
+        else:
+            # default documents count for the entities not translated
+            localized = _localized_tables(entity.__localized_class__)[0]
+            where = ('(docs.is_default = 0 AND docs.locale_id = ? OR '
+                     'docs.is_default = 1 AND NOT EXISTS (SELECT 1 FROM %s '
+                     'WHERE translated_id = docs.translated_id '
+                     'AND locale_id = ?))' % localized.name)
+            params = (text, locale_string, locale_string)
+        result = connection.execute(
+            'SELECT docs.translated_id, bm25(%(fts)s) FROM %(fts)s '
+            'JOIN %(docs)s AS docs ON docs.rowid = %(fts)s.rowid '
+            'WHERE %(fts)s MATCH ? AND %(where)s ORDER BY bm25(%(fts)s)'
+            % {'fts': fts, 'docs': docs, 'where': where}, params)
+        try:
+            while True:
+                rows = result.fetchmany(IN_CLAUSE_CHUNK_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row[0], -row[1]
+        finally:
+            result.close()
+
+
+def _search_text(source, fields):
+    """ returns the document of an entity or a translation, the values
+    of its localized fields one per line
+    """
+    values = [getattr(source, name, None) for name in fields]
+    return u'\n'.join(unicode(value) for value in values if value)
+
+
+def _search_connection(entity):
+    """ returns the connection of the session of entity, on which its
+    index is kept in sync outside of a flush
+    """
+    return entity.query.session.connection(mapper=class_mapper(entity))
+
+
+def _search_ddl(table, entity):
+    """ creates and drops the index of a hierarchy along with its root
+    localized table
+    """
+    backend = entity.__localized_search__
+    table.append_ddl_listener('after-create',
+        lambda event, target, bind: backend.create(bind, entity))
+    table.append_ddl_listener('before-drop',
+        lambda event, target, bind: backend.drop(bind, entity))
+
+
+class LocalizedSearchExtension(MapperExtension):
+    """ indexes the translations as they are flushed
+    """
+
+    def after_insert(self, mapper, connection, instance):
+        entity = instance.__localized_entity__
+        text = _search_text(instance, _all_localized_fields(entity))
+        entity.__localized_search__.index(connection, entity,
+            [(instance.translated_id, instance.locale_id, False, text)])
+        return EXT_CONTINUE
+
+    after_update = after_insert
+
+    def after_delete(self, mapper, connection, instance):
+        entity = instance.__localized_entity__
+        entity.__localized_search__.remove(connection, entity,
+            [instance.translated_id], instance.locale_id)
+        return EXT_CONTINUE
+
+
+localized_search_extension = LocalizedSearchExtension()
+
+
+class TranslatedSearchExtension(MapperExtension):
+    """ indexes the entities in their default language as they are
+    flushed, updates only when a localized field or the default locale
+    changed
+    """
+
+    def after_insert(self, mapper, connection, instance):
+        entity = type(instance)
+        text = _search_text(instance, _all_localized_fields(entity))
+        entity.__localized_search__.index(connection, entity,
+            [(instance.id, instance.default_locale, True, text)])
+        return EXT_CONTINUE
+
+    def after_update(self, mapper, connection, instance):
+        changed = instance_state(instance).committed_state
+        fields = _all_localized_fields(type(instance))
+        if 'default_locale' in changed or \
+           [name for name in fields if name in changed]:
+            return self.after_insert(mapper, connection, instance)
+        return EXT_CONTINUE
+
+    def after_delete(self, mapper, connection, instance):
+        # translations go by ON DELETE CASCADE, their documents with it
+        entity = type(instance)
+        entity.__localized_search__.remove(connection, entity, [instance.id])
+        return EXT_CONTINUE
+
+
+translated_search_extension = TranslatedSearchExtension()
+
+
+def _reindex_translations(session, entity, keys):
+    """ indexes again the translations written with direct statements,
+    given as (translated_id, locale) keys
+    """
+    walk = _walk_session(entity)
+    localized_class = entity.__localized_class__
+    ids = sorted(set(key[0] for key in keys))
+    documents = []
+    for chunk in _chunks(ids, IN_CLAUSE_CHUNK_SIZE):
+        query = walk.query(localized_class).with_polymorphic('*')
+        for localized in query.filter(
+                            localized_class.translated_id.in_(chunk)):
+            if (localized.translated_id, localized.locale_id) in keys:
+                fields = _all_localized_fields(localized.__localized_entity__)
+                documents.append((localized.translated_id,
+                                  localized.locale_id, False,
+                                  _search_text(localized, fields)))
+        walk.expunge_all()
+    entity.__localized_search__.index(_search_connection(entity), entity,
+                                      documents)
+
+
+def _search(entity, text, locale_string, limit):
+    """ returns (entity, score) pairs for the best matches of text
+    among the entities of a class, subclasses included
+    """
+    backend = entity.__localized_search__
+    if backend is None:
+        raise RuntimeError, '%s does not use the search option' \
+                            % entity.__name__
+    session = entity.query.session
+    if session.autoflush:
+        session.flush()
+    matches = backend.search(_search_connection(entity), entity, text,
+                             locale_string)
+    results = []
+    try:
+        # matches of other classes of the hierarchy are skipped
+        while limit is None or len(results) < limit:
+            batch = list(islice(matches, limit or IN_CLAUSE_CHUNK_SIZE))
+            if not batch:
+                break
+            ids = [translated_id for translated_id, score in batch]
+            instances = dict((instance.id, instance) for instance in
+                             entity.query.filter(entity.id.in_(ids)))
+            results.extend((instances[translated_id], score)
+                           for translated_id, score in batch
+                           if translated_id in instances)
+    finally:
+        matches.close()
+    return results[:limit]
+
+
+#
+# helper methods of the localized entities, built once and shared by all
+# the entities of a storage
+#
+
+def _common_methods():
+    """ returns the helper methods common to all storages
+    """
+    def edit_locale(self, locale_string, *args, **kw):
+        """ edit a localized for a given language
+        """
+        localized = self.get_localized(locale_string)
+        if localized is not None:
+            _update_fields(localized, kw)
+        return localized
+
+    def set_locales(self, locales):
+        """ set the fields of many languages at once, given as a dict
+        mapping languages to dicts of fields
+        existing translations are resolved with a single query and
+        updated, missing ones are added, and all are flushed together
+        returns the dict of the translations
+        """
+        localized = dict((translation.locale_id, translation)
+                         for translation in self.get_many_localized(list(locales))
+                         if translation is not self)
+        for locale_string, fields in locales.iteritems():
+            if locale_string in localized:
+                _update_fields(localized[locale_string], fields)
+            elif locale_string == self.default_locale:
+                _update_fields(self, fields)
+                localized[locale_string] = self
+            else:
+                localized[locale_string] = self.add_locale(locale_string,
+                                                           **fields)
+        object_session(self).flush()
+        return localized
+
+    def get_localized_chain(self, chain, per_field=False):
+        """ return the first translation available along a chain of
+        languages, given as a list or as a language whose chain is
+        built from the fallbacks option, or None
+        with per_field, missing fields fall through the chain, and a
+        merged translation is returned
+        all the languages of the chain are resolved with one query
+        """
+        return _resolve_chain(self, _locale_chain(type(self), chain),
+                              per_field)
+
+    def localize_many_chain(cls, entities, chain, per_field=False):
+        """ return a dict mapping each entity, given as instances or
+        ids, to get_localized_chain(chain, per_field), all the
+        translations being resolved with one IN (...) query
+        """
+        instances = _load_instances(cls, entities)
+        chain = _locale_chain(cls, chain)
+        if cls.__localized_storage__ != 'json':
+            _preload_localized(cls, instances, chain)
+        return dict((instance, _resolve_chain(instance, chain, per_field))
+                    for instance in instances)
+
+    return {'edit_locale': edit_locale,
+            'set_locales': set_locales,
+            'get_localized_chain': get_localized_chain,
+            'localize_many_chain': classmethod(localize_many_chain)}
+
+
+def _table_methods():
+    """ returns the helper methods of the table and single storages
+    """
+    def add_locale(self, locale_string, *args, **kw):
+        """ add a new language
+        """
+        localized = self.__localized_class__(translated_id=self.id)
+        localized.locale_id = locale_string
+        localized.__dict__.update(kw)
+        # going through the backref does not load the versions
+        # collection, the translation is only queued for it
+        setattr(localized, localized.__localized_translated__, self)
+        _localized_slot(self)[locale_string] = localized
+        loader = _active_loader(object_session(self))
+        if loader is not None and self.id is not None:
+            loader.remember(self, locale_string, localized)
+        return localized
+
+    def delete_locale(self, locale_string):
+        """ delete a localized for a given language, with direct
+        DELETE statements rather than loading it first
+        """
+        if locale_string == self.default_locale:
+            return
+        session = object_session(self)
+        _forget_localized(session, self, locale_string)
+        if instance_state(self).key is not None:
+            tables = _localized_tables(self.__localized_class__)
+            _delete_translations(session, tables[::-1], [self.id],
+                                 locale_string)
+            if self.__localized_search__ is not None:
+                self.__localized_search__.remove(
+                    _search_connection(type(self)), type(self), [self.id],
+                    locale_string)
+
+    def get_all_localized(self):
+        """ returns translations for all languages *excluding* the default one
+        """
+        localized = getattr(self, self.__localized_versions__)
+        return localized
+
+    def get_many_localized(self, locale_strings):
+        """ returns translations for a list of given language
+        *including* default language if present in the list
+        only languages not already known in memory are queried
+        """
+        localized = []
+        missing = []
+        for locale_string in locale_strings:
+            if locale_string == self.default_locale:
+                continue
+            translation = _loaded_localized(self, locale_string)
+            if translation is _MISSING:
+                missing.append(locale_string)
+            elif translation is not None:
+                localized.append(translation)
+        if missing:
+            session = object_session(self)
+            localized_class = self.__localized_class__
+            slot = _localized_slot(self)
+            queried = []
+            loader = _active_loader(session)
+            if loader is not None:
+                for locale_string in missing:
+                    loader.load(self, locale_string)
+            for locale_string in missing:
+                if loader is not None:
+                    translation = loader.get(self, locale_string)
+                else:
+                    translation = _cached_localized(session,
+                                                    localized_class,
+                                                    self.id, locale_string)
+                if translation is _MISSING:
+                    queried.append(locale_string)
+                elif translation is not None:
+                    localized.append(translation)
+                slot[locale_string] = translation
+            if queried:
+                found = dict.fromkeys(queried)
+                translations = session.query(localized_class).filter(\
+                       and_(localized_class.translated_id==self.id,
+                            localized_class.locale_id.in_(queried))).all()
+                for translation in translations:
+                    found[translation.locale_id] = translation
+                for locale_string, translation in found.iteritems():
+                    _cache_localized(session, localized_class, self.id,
+                                     locale_string, translation)
+                slot.update(found)
+                localized.extend(translations)
+        if self.default_locale in locale_strings:
+            localized.append(self)
+        return localized
+
+    def get_localized(self, locale_string):
+        """ return one and only one translation for a given language
+        returns self if language is the default
+        or None if translation is not set yet
+        the database is only queried if not already known in memory
+        nor in the session, by primary key
+        """
+        if locale_string == self.default_locale:
+            return self
+        localized = _loaded_localized(self, locale_string)
+        if localized is _MISSING:
+            session = object_session(self)
+            localized_class = self.__localized_class__
+            loader = _active_loader(session)
+            if loader is not None:
+                localized = loader.get(self, locale_string)
+            else:
+                localized = _identity_localized(session, localized_class,
+                                                self.id, locale_string)
+            if localized is _MISSING:
+                localized = _cached_localized(session, localized_class,
+                                              self.id, locale_string)
+            if localized is _MISSING:
+                # a primary key lookup, None if there is no such row
+                localized = session.query(localized_class).get(
+                                                (self.id, locale_string))
+                _cache_localized(session, localized_class, self.id,
+                                 locale_string, localized)
+            _localized_slot(self)[locale_string] = localized
+        return localized
+
+    def localize_many(cls, entities, locale_string):
+        """ return a dict mapping each entity to its translation
+        for a given language, resolved with one IN (...) query
+        entities can be given as instances or as ids
+        falls back to the entity itself if language is its default
+        or None if translation is not set yet
+        """
+        instances = _load_instances(cls, entities)
+        session = cls.query.session
+
+        localized_class = cls.__localized_class__
+        found = {}
+        queried = []
+        for instance in instances:
+            translation = _cached_localized(session, localized_class,
+                                            instance.id, locale_string)
+            if translation is _MISSING:
+                queried.append(instance.id)
+            else:
+                found[instance.id] = translation
+        for chunk in _chunks(queried, IN_CLAUSE_CHUNK_SIZE):
+            # load subclasses columns in the same SELECT
+            query = session.query(localized_class).with_polymorphic('*')
+            query = query.filter(and_(
+                        localized_class.translated_id.in_(chunk),
+                        localized_class.locale_id==locale_string))
+            for localized in query:
+                found[localized.translated_id] = localized
+        for translated_id in queried:
+            _cache_localized(session, localized_class, translated_id,
+                             locale_string, found.get(translated_id))
+
+        localized = {}
+        for instance in instances:
+            translation = found.get(instance.id)
+            if translation is None and \
+               locale_string == instance.default_locale:
+                translation = instance
+            _localized_slot(instance)[locale_string] = found.get(instance.id)
+            localized[instance] = translation
+        return localized
+
+    def localized_query(cls, locale_string, query=None):
+        """ iterate over entities with their translation for a given
+        language loaded in the same SELECT through a LEFT OUTER JOIN,
+        so that get_localized(locale_string) needs no further query
+        query defaults to all entities and can be any query on cls
+        """
+        localized_class = cls.__localized_class__
+        if query is None:
+            query = cls.query
+        query = query.outerjoin((localized_class,
+                    and_(localized_class.translated_id==cls.id,
+                         localized_class.locale_id==locale_string)))
+        for instance, localized in query.add_entity(localized_class):
+            _localized_slot(instance)[locale_string] = localized
+            yield instance
+
+    def import_translations(cls, records, batch_size=1000, upsert=False):
+        """ writes translations given as (id, locale, fields) records
+        straight to the localized tables, batch_size records at a time,
+        without building any object, so records can be streamed
+        existing translations are updated if upsert is True
+        returns the number of records written
+        """
+        session = cls.query.session
+        count = 0
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                _write_translations(session, cls, batch, upsert)
+                count += len(batch)
+                batch = []
+        if batch:
+            _write_translations(session, cls, batch, upsert)
+            count += len(batch)
+        _cache_invalidate(session, 'invalidate_class',
+                          cls.__localized_class__)
+        return count
+
+    def export_translations(cls, locale_strings=None, batch_size=1000):
+        """ yields translations as (id, locale, fields) records,
+        for the given languages or all of them, read batch_size
+        rows at a time without building any object
+        """
+        return _read_translations(cls.query.session,
+                                  cls.__localized_class__,
+                                  locale_strings, batch_size)
+
+    def aget_localized(self, locale_string):
+        """ returns a LocalizedFuture of the translation for a given
+        language, loaded in a background thread unless already known;
+        concurrent requests for the same translation share one query
+        """
+        return _submit_localized([self], locale_string)[0]
+
+    def alocalize_many(cls, instances, locale_string):
+        """ returns a LocalizedManyFuture of the dict mapping each
+        instance to its translation, the missing ones being loaded
+        with one IN (...) query in a background thread
+        """
+        return LocalizedManyFuture(_submit_localized(instances,
+                                                     locale_string))
+
+    def translation_coverage(cls, locale_strings=None):
+        """ returns a dict mapping languages, the given ones or all of
+        them, to the number of entities translated or written in it,
+        computed with one GROUP BY query
+        """
+        return _translation_coverage(cls.query.session, cls,
+                                     locale_strings)
+
+    def missing_locales(cls, locale_strings):
+        """ returns a dict mapping each given language to the sorted
+        ids of the entities neither translated nor written in it
+        """
+        return _missing_locales(cls.query.session, cls, locale_strings)
+
+    def stale_translations(cls, since=None, locale_strings=None):
+        """ returns as sorted (id, locale) tuples the translations
+        updated before their entity, which changed since the given
+        datetime if any; needs the timestamps option
+        """
+        return _stale_translations(cls.query.session, cls, since,
+                                   locale_strings)
+
+    def iter_localized(cls, locale_string, chunk_size=1000):
+        """ yields (entity, translation) pairs for all the entities
+        translated in a given language, loading chunk_size of them at
+        a time in a session of their own, so that memory does not grow
+        with the number of translations
+        """
+        return _iter_localized(cls, locale_string, chunk_size)
+
+    def purge_locale(cls, locale_string, batch_size=IN_CLAUSE_CHUNK_SIZE):
+        """ deletes the translations of the entities of the class in
+        a language, batch_size at a time, pending changes being
+        flushed first
+        returns the number of translations deleted
+        """
+        return _purge_locale(cls, locale_string, batch_size)
+
+    def search(cls, text, locale=None, limit=20):
+        """ returns (entity, score) pairs for the entities of the class
+        whose localized fields match a full-text query in a language,
+        best first, entities not translated in it being matched in their
+        default language; with no locale, only default languages are
+        searched; needs the search option
+        """
+        return _search(cls, text, locale, limit)
+
+    def localized_rows(cls, locale_string, fields=None, batch_size=1000):
+        """ yields read-only records (named tuples) of the given fields,
+        all the columns of the entity by default, for the entities
+        translated in a given language, localized fields holding their
+        translation; read batch_size rows at a time with one SELECT,
+        without building any mapped object
+        """
+        return _read_localized_rows(cls.query.session, cls, locale_string,
+                                    fields, batch_size)
+
+    def localized_pivot(cls, locale_strings, fields=None, query=None,
+                        batch_size=1000):
+        """ yields read-only records (id, <field>_<locale>, ...) of the
+        values of localized fields, all of them by default, in several
+        languages for the entities of query, all of them by default;
+        missing translations give None; read batch_size rows at a time
+        with one SELECT joining the localized tables once per language
+        """
+        return _read_pivot_rows(cls.query.session, cls, locale_strings,
+                                fields, query, batch_size)
+
+    return {'add_locale': _instrument('add_locale', add_locale),
+            'delete_locale': _instrument('delete_locale', delete_locale),
+            'get_all_localized': get_all_localized,
+            'get_many_localized': _instrument('get_many_localized',
+                                              get_many_localized),
+            'get_localized': _instrument('get_localized', get_localized),
+            'localize_many': classmethod(_instrument('localize_many',
+                                                     localize_many)),
+            'localized_query': classmethod(localized_query),
+            'import_translations': classmethod(import_translations),
+            'export_translations': classmethod(export_translations),
+            'localized_rows': classmethod(localized_rows),
+            'localized_pivot': classmethod(localized_pivot),
+            'search': classmethod(_instrument('search', search)),
+            'iter_localized': classmethod(iter_localized),
+            'purge_locale': classmethod(_instrument('purge_locale',
+                                                    purge_locale)),
+            'aget_localized': aget_localized,
+            'alocalize_many': classmethod(alocalize_many),
+            'translation_coverage': classmethod(translation_coverage),
+            'missing_locales': classmethod(missing_locales),
+            'stale_translations': classmethod(stale_translations)}
+
+
+def _json_methods():
+    """ returns the helper methods of the json storage
+    """
+    def add_locale(self, locale_string, *args, **kw):
+        """ add a new language
+        """
+        fields = dict((name, value) for name, value in kw.iteritems()
+                      if name in self.__localized_class__.__localized_fields__)
+        _set_json_fields(self, locale_string, fields, replace=True)
+        return self.get_localized(locale_string)
+
+    def delete_locale(self, locale_string):
+        """ delete a localized for a given language
+        """
+        data = dict(_json_data(self))
+        if data.pop(locale_string, None) is not None:
+            setattr(self, JSON_COLUMN, data)
+
+    def get_all_localized(self):
+        """ returns translations for all languages *excluding* the default one
+        """
+        return [self.get_localized(locale_string)
+                for locale_string in sorted(_json_data(self))]
+
+    def get_many_localized(self, locale_strings):
+        """ returns translations for a list of given language
+        *including* default language if present in the list
+        """
+        data = _json_data(self)
+        localized = [self.get_localized(locale_string)
+                     for locale_string in locale_strings
+                     if locale_string in data
+                     and locale_string != self.default_locale]
+        if self.default_locale in locale_strings:
+            localized.append(self)
+        return localized
+
+    def get_localized(self, locale_string):
+        """ return one and only one translation for a given language
+        returns self if language is the default
+        or None if translation is not set yet
+        """
+        if locale_string == self.default_locale:
+            return self
+        if locale_string in _json_data(self):
+            slot = _localized_slot(self)
+            localized = slot.get(locale_string)
+            if localized is None:
+                localized = self.__localized_class__(self, locale_string)
+                slot[locale_string] = localized
+            return localized
+        return None
+
+    def localize_many(cls, entities, locale_string):
+        """ return a dict mapping each entity to its translation
+        for a given language, entities can be given as instances or ids
+        """
+        instances = _load_instances(cls, entities)
+        return dict((instance, instance.get_localized(locale_string))
+                    for instance in instances)
+
+    def localized_query(cls, locale_string, query=None):
+        """ iterate over entities, whose translations are always
+        loaded along with them
+        """
+        if query is None:
+            query = cls.query
+        for instance in query:
+            yield instance
+
+    def import_translations(cls, records, batch_size=1000, upsert=False):
+        """ writes translations given as (id, locale, fields) records
+        straight to the json column, batch_size records at a time
+        existing translations are updated if upsert is True
+        returns the number of records written
+        """
+        session = cls.query.session
+        count = 0
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                _write_json_translations(session, cls, batch, upsert)
+                count += len(batch)
+                batch = []
+        if batch:
+            _write_json_translations(session, cls, batch, upsert)
+            count += len(batch)
+        return count
+
+    def export_translations(cls, locale_strings=None, batch_size=1000):
+        """ yields translations as (id, locale, fields) records,
+        for the given languages or all of them, read batch_size
+        rows at a time without building any object
+        """
+        return _read_json_translations(cls.query.session, cls,
+                                       locale_strings, batch_size)
+
+    def aget_localized(self, locale_string):
+        """ returns a LocalizedFuture of the translation for a given
+        language, already available with the json storage
+        """
+        return LocalizedFuture(self, locale_string)
+
+    def alocalize_many(cls, instances, locale_string):
+        """ returns a LocalizedManyFuture of the dict mapping each
+        instance to its translation
+        """
+        return LocalizedManyFuture([LocalizedFuture(instance,
+                                                    locale_string)
+                                    for instance in instances])
+
+    def translation_coverage(cls, locale_strings=None):
+        """ returns a dict mapping languages, the given ones or all of
+        them, to the number of entities translated or written in it
+        """
+        return _json_translation_coverage(cls.query.session, cls,
+                                          locale_strings)
+
+    def missing_locales(cls, locale_strings):
+        """ returns a dict mapping each given language to the sorted
+        ids of the entities neither translated nor written in it
+        """
+        return _json_missing_locales(cls.query.session, cls,
+                                     locale_strings)
+
+    def stale_translations(cls, since=None, locale_strings=None):
+        """ the json storage keeps no timestamps
+        """
+        return _stale_translations(cls.query.session, cls, since,
+                                   locale_strings)
+
+    def iter_localized(cls, locale_string, chunk_size=1000):
+        """ yields (entity, translation) pairs for all the entities
+        translated in a given language, chunk_size at a time
+        """
+        return _iter_json_localized(cls, locale_string, chunk_size)
+
+    def purge_locale(cls, locale_string, batch_size=IN_CLAUSE_CHUNK_SIZE):
+        """ removes a language from the json column of the entities
+        of the class, batch_size rows at a time, pending changes being
+        flushed first
+        returns the number of translations deleted
+        """
+        return _purge_json_locale(cls, locale_string, batch_size)
+
+    def search(cls, text, locale=None, limit=20):
+        """ the json storage has no search index
+        """
+        return _search(cls, text, locale, limit)
+
+    def localized_rows(cls, locale_string, fields=None, batch_size=1000):
+        """ yields read-only records (named tuples) of the given fields
+        for the entities translated in a given language, read batch_size
+        rows at a time without building any mapped object
+        """
+        return _read_json_localized_rows(cls.query.session, cls,
+                                         locale_string, fields, batch_size)
+
+    def localized_pivot(cls, locale_strings, fields=None, query=None,
+                        batch_size=1000):
+        """ yields read-only records (id, <field>_<locale>, ...) of the
+        values of localized fields in several languages for the entities
+        of query, read from the json column batch_size rows at a time
+        """
+        return _read_json_pivot_rows(cls.query.session, cls, locale_strings,
+                                     fields, query, batch_size)
+
+    return {'add_locale': _instrument('add_locale', add_locale),
+            'delete_locale': _instrument('delete_locale', delete_locale),
+            'get_all_localized': get_all_localized,
+            'get_many_localized': _instrument('get_many_localized',
+                                              get_many_localized),
+            'get_localized': _instrument('get_localized', get_localized),
+            'localize_many': classmethod(_instrument('localize_many',
+                                                     localize_many)),
+            'localized_query': classmethod(localized_query),
+            'import_translations': classmethod(import_translations),
+            'export_translations': classmethod(export_translations),
+            'localized_rows': classmethod(localized_rows),
+            'localized_pivot': classmethod(localized_pivot),
+            'search': classmethod(_instrument('search', search)),
+            'iter_localized': classmethod(iter_localized),
+            'purge_locale': classmethod(_instrument('purge_locale',
+                                                    purge_locale)),
+            'aget_localized': aget_localized,
+            'alocalize_many': classmethod(alocalize_many),
+            'translation_coverage': classmethod(translation_coverage),
+            'missing_locales': classmethod(missing_locales),
+            'stale_translations': classmethod(stale_translations)}
+
+
+_COMMON_METHODS = _common_methods()
+_TABLE_METHODS = _table_methods()
+_JSON_METHODS = _json_methods()
+
 
 class LocalizedEntityBuilder(EntityBuilder):
     """ acts_as_localized statement
     """
 
-    def __init__(self, entity, for_fields=[], default_locale=u'en'):
+    def __init__(self, entity, for_fields=[], default_locale=u'en',
+                 locale_index=True, covering_fields=[], type_index=False,
+                 storage=None, fallbacks=None, timestamps=None,
+                 search=None):
         self.entity = entity
+        self.add_mapper_extension(localized_mapper_extension)
         entity.__localized_fields__ = for_fields
         self.default_locale = default_locale
+        if fallbacks is not None:
+            entity.__localized_fallbacks__ = fallbacks
+        for field in covering_fields:
+            if field not in for_fields:
+                raise RuntimeError, \
+                      'covered field %r is not a localized field' % field
+        self.locale_index = locale_index or bool(covering_fields)
+        self.covering_fields = covering_fields
+        self.type_index = type_index
+        if storage not in (None, 'table', 'single', 'json'):
+            raise RuntimeError, 'unknown localized storage %r' % storage
+        # hierarchies are stored as their parent unless told otherwise
+        parent_storage = getattr(entity, '__localized_storage__', None)
+        if storage is None:
+            storage = parent_storage or 'table'
+        if parent_storage is not None and \
+           (storage == 'json') != (parent_storage == 'json'):
+            raise RuntimeError, 'json storage must be used by a whole hierarchy'
+        entity.__localized_storage__ = storage
+        self.json_root = storage == 'json' and parent_storage != 'json'
+        parent_timestamps = getattr(entity, '__localized_timestamps__', None)
+        if timestamps is None:
+            timestamps = bool(parent_timestamps)
+        elif parent_timestamps is not None and timestamps != parent_timestamps:
+            raise RuntimeError, 'timestamps must be used by a whole hierarchy'
+        if timestamps and storage == 'json':
+            raise RuntimeError, 'timestamps are not available with the json storage'
+        entity.__localized_timestamps__ = timestamps
+        self.timestamps_root = timestamps and not parent_timestamps
+        if self.timestamps_root:
+            self.add_mapper_extension(localized_timestamp_extension)
+        # True stands for the backend of the parent level, or SQLite FTS5
+        parent_search = getattr(entity, '__localized_search__', None)
+        if search is True:
+            search = parent_search or SQLiteFTSBackend()
+        elif search is None:
+            search = parent_search
+        search = search or None
+        if parent_storage is not None and search is not parent_search:
+            raise RuntimeError, 'search must be used by a whole hierarchy'
+        if search is not None and storage == 'json':
+            raise RuntimeError, 'search is not available with the json storage'
+        entity.__localized_search__ = search
+        if search is not None and parent_storage is None:
+            self.add_mapper_extension(translated_search_extension)
 
+    @_setup_phase
     def create_non_pk_cols(self):
         """ non primary key columns
         """
         self.add_table_column(Column('default_locale', Unicode,
                                      default=self.default_locale))
+        if self.json_root:
+            self.add_table_column(Column(JSON_COLUMN, JSONEncodedDict))
+        if self.timestamps_root:
+            self.add_table_column(Column(UPDATED_COLUMN, DateTime,
+                                         default=datetime.now,
+                                         onupdate=datetime.now))
 
     # we copy columns from the main entity table, so we need it to exist first
+    @_setup_phase
     def after_table(self):
 
         entity = self.entity
-
-        def localized_init(self, **kw):
-            self.__dict__.update(kw)
+        if entity.__localized_storage__ == 'json':
+            return self.after_table_json()
 
         # create a localized table for the localized
-        columns_and_constraints = [column.copy() for column in entity.table.c
+        localized_columns = [column.copy() for column in entity.table.c
                    if column.name in entity.__localized_fields__]
+        columns_and_constraints = list(localized_columns)
 
         entity_pks = entity._descriptor.primary_keys
         entity_pk_name = entity_pks[0].name
@@ -53,8 +3423,10 @@ class LocalizedEntityBuilder(EntityBuilder):
             raise RuntimeError,  'Your entity *MUST* have a single primary key to be localized'
 
         # we define the primary key as a tuple (translated object, language)
+        # translations are deleted by the database along with their entity
         columns_and_constraints.append(Column('translated_id', None,
-                              ForeignKey("%s.%s" % (entity.table.name, entity_pk_name)),
+                              ForeignKey("%s.%s" % (entity.table.name, entity_pk_name),
+                                         ondelete='CASCADE'),
                               primary_key=True,
                        ))
         columns_and_constraints.append(Column('locale_id', String, primary_key=True))
@@ -71,28 +3443,58 @@ class LocalizedEntityBuilder(EntityBuilder):
         if entity_parent_class:
             localized_parent_class = getattr(entity_parent_class, '__localized_class__', False)
 
-        # XXX!!!! should find a way to determine if this is needed (non polymorph)
-        if localized_parent_class:
-            # polymorphic inheritance is based on the foreign key tuple :
-            # (translated content, language)
-            # which tuple is the primary key of the root table
-            for table in localized_parent_class._sa_class_manager.mapper.tables:
-                parent_table_name = table.name
-                columns_and_constraints.append(ForeignKeyConstraint(['translated_id',
-                                                    'locale_id'],
-                                                   ['%s.translated_id' % parent_table_name,
-                                                    '%s.locale_id' % parent_table_name]))
-        else: # root case
-            # if at root of the inheritance tree, add a translated_type column
-            # to determine the type of object to load (polymorphic type)
-            columns_and_constraints.append(Column('translated_type', Unicode(40), nullable=False))
+        storage = entity.__localized_storage__
+
+        if localized_parent_class and storage == 'single':
+            # single table inheritance: the localized columns are added
+            # to the table of the parent, no other table is involved
+            table = class_mapper(localized_parent_class).local_table
+            for column in localized_columns:
+                if column.name in table.c:
+                    raise RuntimeError, 'localized field %r is already ' \
+                          'stored in %s' % (column.name, table.name)
+                table.append_column(column)
+            entity.__localized_table__ = table
+        else:
+            # XXX!!!! should find a way to determine if this is needed (non polymorph)
+            if localized_parent_class:
+                # polymorphic inheritance is based on the foreign key tuple :
+                # (translated content, language)
+                # which tuple is the primary key of the root table
+                for table in localized_parent_class._sa_class_manager.mapper.tables:
+                    parent_table_name = table.name
+                    columns_and_constraints.append(ForeignKeyConstraint(['translated_id',
+                                                        'locale_id'],
+                                                       ['%s.translated_id' % parent_table_name,
+                                                        '%s.locale_id' % parent_table_name],
+                                                       ondelete='CASCADE'))
+            else: # root case
+                # if at root of the inheritance tree, add a translated_type column
+                # to determine the type of object to load (polymorphic type)
+                columns_and_constraints.append(Column('translated_type', Unicode(40), nullable=False))
+                if entity.__localized_timestamps__:
+                    columns_and_constraints.append(Column(UPDATED_COLUMN,
+                                                          DateTime,
+                                                          default=datetime.now,
+                                                          onupdate=datetime.now))
 
-        # now make the table
-        table = Table(entity.table.name + '_localized', entity.table.metadata,
-                      *columns_and_constraints
-                     )
+            # now make the table
+            table = Table(entity.table.name + '_localized', entity.table.metadata,
+                          *columns_and_constraints
+                         )
 
-        entity.__localized_table__ = table
+            entity.__localized_table__ = table
+            _register_localized_table(table)
+
+            # the primary key serves lookups by translated_id,
+            # add indexes for the lookups by language
+            if self.locale_index:
+                Index('ix_%s_locale_id' % table.name,
+                      table.c.locale_id, table.c.translated_id,
+                      *[table.c[field] for field in self.covering_fields])
+            if self.type_index and not localized_parent_class:
+                Index('ix_%s_translated_type' % table.name,
+                      table.c.translated_type, table.c.locale_id)
 
         not_localized_columns = [column.name for column in entity.table.c
                                    if not column.name in entity.__localized_fields__]
@@ -101,32 +3503,33 @@ class LocalizedEntityBuilder(EntityBuilder):
         if localized_parent_class:
             not_localized_columns.extend(localized_parent_class.__not_localized_fields__)
             Localized = type('Localized', (localized_parent_class, ),
-                             {'__init__': localized_init,
+                             {'__init__': _localized_init,
                               })
         else: # root case
             Localized = type('Localized', (object, ),
-                             {'__init__': localized_init,
+                             {'__init__': _localized_init,
                               })
         # massage the object attributes
         # zope.interface implements declaration
-        classImplements(Localized, implementedBy(entity))
+        _implements_entity(Localized, entity)
         Localized.__not_localized_fields__ = not_localized_columns
         Localized.__name__ = entity.__name__ + 'Localized'
         Localized.__localized_entity__ = entity
 
-        #  add assoc proxy for untranslated columns
-        for fname in [field for field in not_localized_columns if not hasattr(Localized, field)]:
-            setattr(Localized, fname, association_proxy('%s_translated' % Localized.__name__, fname))
+        Localized.__localized_translated__ = '%s_translated' % Localized.__name__
 
+        # columns of the localized table are mapped later on
+        _install_translated_columns(Localized, excluded=table.c.keys())
 
-        def localized__repr__(self):
-            return '<%r %r, id: %r for: %r>' \
-               % (self.__class__.__name__, self.locale_id,
-                  self.translated_id, self.__localized_entity__)
-        Localized.__repr__ = localized__repr__
+        Localized.__repr__ = _localized_repr
 
         # map the localized class to the localized table for this entity
-        if localized_parent_class:
+        if localized_parent_class and storage == 'single':
+            mapper(Localized,
+                   inherits=localized_parent_class,
+                   polymorphic_identity='%s_localized' % entity.__name__.lower()
+                   )
+        elif localized_parent_class:
             # if we inherit from another Localized
             mapper(Localized, table,
                    inherits=localized_parent_class,
@@ -134,54 +3537,68 @@ class LocalizedEntityBuilder(EntityBuilder):
                    )
         else:
             # if at root of the inheritance tree, polymorphic_on is required
+            extension = [localized_cache_extension]
+            if entity.__localized_timestamps__:
+                extension.append(localized_timestamp_extension)
+            if entity.__localized_search__ is not None:
+                extension.append(localized_search_extension)
+                _search_ddl(table, entity)
             mapper(Localized, table,
+                   extension=extension,
                    polymorphic_on=table.c.translated_type,
                    polymorphic_identity='%s_localized' % entity.__name__.lower()
                    )
 
 
 
-        def get_localized_attr(self, attr):
-            """ will return either the 'translated' attribute or
-            the Localized one, as this will replace the __getattr__
-            for the Localized class
-            """
-#
-#            if attr.startswith('gen'):
-#                from nose.tools import set_trace; set_trace()
-
-            if attr.startswith('_'):
-                return object.__getattribute__(self, attr)
-            try:
-                return self.__getattribute__(attr)
-            except AttributeError:
-                translated = getattr(self, '%s_translated' % self.__class__.__name__)
-                return getattr(translated, attr)
-
-#            if attr in Localized.__not_localized_fields__:
-#                translated = getattr(self, '%s_translated' % self.__class__.__name__)
-#                return getattr(translated, attr)
-#            else:
-#                return self.__getattribute__(attr)
-
         # patching __getattr__ for Localized
         Localized.__getattr__ = get_localized_attr
 
-
         entity.__localized_class__ = Localized
 
 
+    def after_table_json(self):
+        """ the json storage uses no table, translations are
+        represented by views on the json column of the entity
+        """
+        entity = self.entity
+        # a subclass view inherits from the view of its parent
+        parent = getattr(entity, '__localized_class__', LocalizedView)
+        fields = tuple(parent.__localized_fields__) + \
+                 tuple(entity.__localized_fields__)
+        Localized = type(entity.__name__ + 'Localized', (parent, ),
+                         {'__slots__': (),
+                          '__localized_fields__': fields,
+                          '__localized_entity__': entity,
+                          })
+        _implements_entity(Localized, entity)
+        Localized.__not_localized_fields__ = \
+                [column.name for column in entity.table.c
+                 if column.name not in fields] + \
+                list(parent.__not_localized_fields__)
+        for name in entity.__localized_fields__:
+            setattr(Localized, name, LocalizedJsonField(name))
+        _install_translated_columns(Localized)
+        entity.__localized_class__ = Localized
+
+    @_setup_phase
     def after_mapper(self):
         """
         """
         entity = self.entity
+        if entity.__localized_storage__ == 'json':
+            return
         # we must name the relation after the entity name
         # otherwise it would supercede the same relationship on inherited mapper
         # same thing for the backref
-        entity.mapper.add_property('%s_localized_versions' % entity.__name__,
+        entity.__localized_versions__ = '%s_localized_versions' % entity.__name__
+        entity.mapper.add_property(entity.__localized_versions__,
                                    relation(entity.__localized_class__,
                                             backref='%s_translated' % entity.__localized_class__.__name__,
                                             cascade = 'all',
+                                            # unloaded translations are
+                                            # deleted by the mapper extension
+                                            passive_deletes = True,
                                             )
                                    )
 
@@ -194,75 +3611,20 @@ class LocalizedEntityBuilder(EntityBuilder):
 #        from nose.tools import set_trace; set_trace()
 ##        zz=filter( lambda x: type(x) == type(RelationshipProperty), tt)
 
+    @_setup_phase
     def finalize(self):
-        """ add helper methods to the entity
+        """ add helper methods to the entity, the same functions being
+        shared by all the localized entities
         """
         entity = self.entity
-
-        def add_locale(self, locale_string, *args, **kw):
-            """ add a new language
-            """
-            localized = self.__localized_class__(translated_id=self.id)
-            localized.locale_id = locale_string
-            localized.__dict__.update(kw)
-            getattr(self, '%s_localized_versions' % entity.__name__).append(localized)
-            return localized
-
-        def edit_locale(self, locale_string, *args, **kw):
-            """ edit a localized for a given language
-            """
-            localized = self.get_localized(locale_string)
-            if localized is not None:
-                localized.__dict__.update(kw)
-            return localized
-
-        def delete_locale(self, locale_string):
-            """ delete a localized for a given language
-            """
-            localized = self.get_localized(locale_string)
-            if localized is not self and localized is not None:
-                object_session(self).delete(localized)
-
-        def get_all_localized(self):
-            """ returns translations for all languages *excluding* the default one
-            """
-            localized = getattr(self, '%s_localized_versions' % entity.__name__)
-            return localized
-
-        def get_many_localized(self, locale_strings):
-            """ returns translations for a list of given language
-            *including* default language if present in the list
-            """
-            localized = object_session(self).query(self.__localized_class__).filter(\
-                   and_(self.__localized_class__.translated_id==self.id,
-                        self.__localized_class__.locale_id.in_(locale_strings))).all()
-            if self.default_locale in locale_strings:
-                localized.append(self)
-            return localized
-
-        def get_localized(self, locale_string):
-            """ return one and only one translation for a given language
-            returns self if language is the default
-            or None if translation is not set yet
-            """
-            localized = None
-            try:
-                localized = object_session(self).query(self.__localized_class__).filter( \
-                       and_(self.__localized_class__.translated_id==self.id,
-                            self.__localized_class__.locale_id==locale_string))[0]
-            except IndexError:
-                if locale_string == self.default_locale:
-                    return self
-                pass
-            return localized
-
-        entity.add_locale = add_locale
-        entity.edit_locale = edit_locale
-        entity.delete_locale = delete_locale
-        entity.get_all_localized = get_all_localized
-        entity.get_many_localized = get_many_localized
-        entity.get_localized = get_localized
-
+        for name, method in _COMMON_METHODS.iteritems():
+            setattr(entity, name, method)
+        if entity.__localized_storage__ == 'json':
+            methods = _JSON_METHODS
+        else:
+            methods = _TABLE_METHODS
+        for name, method in methods.iteritems():
+            setattr(entity, name, method)
 
 
 acts_as_localized = Statement(LocalizedEntityBuilder)
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+from elixir import has_field, Unicode, using_options
+from elixir import Entity
+from elixirext.localized import acts_as_localized, LocalizedExecutor, \
+                                set_localized_executor
+import unittest
+
+from sqlalchemy import create_engine
+from elixir import setup_all, create_all, drop_all
+
+from elixir import metadata, session
+
+from tests import engine
+
+class Tale(Entity):
+    has_field('author', Unicode)
+    has_field('title', Unicode)
+
+    acts_as_localized(for_fields=['title'], default_locale='en')
+    using_options(tablename='tales')
+
+
+class ManualExecutor(object):
+    """ runs the submitted functions when told to
+    """
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, function, *args):
+        self.submitted.append((function, args))
+
+    def run(self):
+        for function, args in self.submitted:
+            function(*args)
+        self.submitted = []
+
+
+class TestFutures(unittest.TestCase):
+
+    def setUp(self):
+        """Method used to build a database"""
+        metadata.bind = engine
+        setup_all()
+        create_all()
+
+        tale = Tale(author=u'Galland', title=u'Aladdin')
+        tale.add_locale('fr', title=u"Aladin ou la Lampe merveilleuse")
+        other = Tale(author=u'Galland', title=u'Ali Baba')
+        other.add_locale('fr', title=u'Ali Baba et les quarante voleurs')
+        session.commit()
+        session.expunge_all()
+        self.executor = ManualExecutor()
+        set_localized_executor(self.executor)
+
+    def tearDown(self):
+        """Method used to destroy a database"""
+        set_localized_executor(None)
+        session.rollback()
+        drop_all()
+
+    def test_aget_localized(self):
+        tale = Tale.get(1)
+        future = tale.aget_localized('fr')
+        assert not future.done()
+        self.executor.run()
+        assert future.done()
+        fr = future.result()
+        assert fr.title == u'Aladin ou la Lampe merveilleuse'
+        assert fr.author == u'Galland'
+        assert fr is tale.get_localized('fr')
+        assert fr in session
+
+    def test_uncommitted(self):
+        tale = Tale.get(2)
+        future = tale.aget_localized('de')
+        self.executor.run()
+        session.add(Tale.__localized_class__(translated_id=2, locale_id='de',
+                                             title=u'Ali Baba und die 40 Räuber'))
+        session.flush()
+        # the load did not see the translation written meanwhile
+        assert future.result().title == u'Ali Baba und die 40 Räuber'
+
+        tale = Tale.get(1)
+        tale.add_locale('de', title=u'Aladin und die Wunderlampe')
+        session.flush()
+        tale.__dict__.pop('_localized_slot')
+        # the transaction wrote translations, they are read in it
+        future = tale.aget_localized('de')
+        assert future.done()
+        assert self.executor.submitted == []
+        assert future.result().title == u'Aladin und die Wunderlampe'
+
+    def test_memory_database(self):
+        session.close()
+        metadata.bind = create_engine('sqlite://')
+        try:
+            create_all()
+            tale = Tale(author=u'Galland', title=u'Aladdin')
+            tale.add_locale('fr', title=u"Aladin ou la Lampe merveilleuse")
+            session.commit()
+            session.expunge_all()
+            # the connections of other threads see other databases
+            future = Tale.get(1).aget_localized('fr')
+            assert self.executor.submitted == []
+            assert future.result().title == u"Aladin ou la Lampe merveilleuse"
+        finally:
+            session.close()
+            metadata.bind = engine
+
+    def test_default_and_missing(self):
+        tale = Tale.get(1)
+        en = tale.aget_localized('en')
+        de = tale.aget_localized('de')
+        self.executor.run()
+        assert en.result() is tale
+        assert de.result() is None
+
+    def test_known_translation(self):
+        tale = Tale.get(1)
+        fr = tale.get_localized('fr')
+        future = tale.aget_localized('fr')
+        assert future.done()
+        assert future.result() is fr
+        assert self.executor.submitted == []
+
+    def test_coalescing(self):
+        tale = Tale.get(1)
+        first = tale.aget_localized('fr')
+        second = tale.aget_localized('fr')
+        many = Tale.alocalize_many(Tale.query.all(), 'fr')
+        # one load for the tale, one for the other one
+        assert len(self.executor.submitted) == 2
+        self.executor.run()
+        assert first.result() is second.result()
+        localized = many.result()
+        assert localized[tale] is first.result()
+        assert sorted(fr.title for fr in localized.values()) == \
+               [u'Aladin ou la Lampe merveilleuse',
+                u'Ali Baba et les quarante voleurs']
+
+    def test_threads(self):
+        set_localized_executor(LocalizedExecutor(workers=2))
+        localized = Tale.alocalize_many(Tale.query.all(), 'fr').result(10)
+        assert sorted(fr.title for fr in localized.values()) == \
+               [u'Aladin ou la Lampe merveilleuse',
+                u'Ali Baba et les quarante voleurs']
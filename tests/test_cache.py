@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+from elixir import has_field, Unicode, using_options
+from elixir import Entity
+from elixirext.localized import acts_as_localized, LocalizedCache, \
+                                LRUCacheBackend, set_localized_cache
+import unittest
+import threading
+
+from elixir import setup_all, create_all, drop_all
+
+from elixir import metadata, session
+
+from tests import engine
+
+class Book(Entity):
+    has_field('author', Unicode)
+    has_field('title', Unicode)
+
+    acts_as_localized(for_fields=['title'], default_locale='en')
+    using_options(tablename='books')
+
+
+class TestLRUCacheBackend(unittest.TestCase):
+
+    def test_eviction(self):
+        backend = LRUCacheBackend(max_size=2)
+        backend['a'] = 1
+        backend['b'] = 2
+        assert backend['a'] == 1
+        backend['c'] = 3
+        # 'b' was the least recently used
+        self.assertRaises(KeyError, backend.__getitem__, 'b')
+        assert backend['a'] == 1
+        assert backend['c'] == 3
+        assert backend.evictions == 1
+
+    def test_ttl(self):
+        backend = LRUCacheBackend(ttl=-1)
+        backend['a'] = 1
+        self.assertRaises(KeyError, backend.__getitem__, 'a')
+
+    def test_threads(self):
+        backend = LRUCacheBackend(max_size=50)
+        errors = []
+        def work(offset):
+            try:
+                for i in range(2000):
+                    key = str((offset + i) % 80)
+                    backend[key] = i
+                    try:
+                        backend[key]
+                    except KeyError:
+                        pass
+            except Exception, error:
+                errors.append(error)
+        threads = [threading.Thread(target=work, args=(i * 10, ))
+                   for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        assert len(backend) == 50
+
+
+class TestLocalizedCache(unittest.TestCase):
+
+    def setUp(self):
+        """Method used to build a database"""
+        metadata.bind = engine
+        setup_all()
+        create_all()
+
+        book = Book(author=u'Galland', title=u'The Thousand and One Nights')
+        book.add_locale('fr', title=u'Les mille et une nuits')
+        session.commit()
+        session.expunge_all()
+        self.cache = LocalizedCache()
+        set_localized_cache(self.cache)
+
+    def tearDown(self):
+        """Method used to destroy a database"""
+        set_localized_cache(None)
+        session.rollback()
+        drop_all()
+
+    def test_hit(self):
+        assert Book.get(1).get_localized('fr').title == u'Les mille et une nuits'
+        assert Book.get(1).get_localized('de') is None
+        session.expunge_all()
+        # the database is not read anymore
+        session.execute(Book.__localized_table__.update().values(title=u'changed'))
+        fr = Book.get(1).get_localized('fr')
+        assert fr.title == u'Les mille et une nuits'
+        assert fr.author == u'Galland'
+        assert Book.get(1).get_localized('de') is None
+        assert self.cache.stats()['hits'] == 2
+        assert self.cache.stats()['misses'] == 2
+
+    def test_localize_many(self):
+        book = Book.get(1)
+        assert Book.localize_many([book], 'fr')[book].title == u'Les mille et une nuits'
+        session.expunge_all()
+        book = Book.get(1)
+        assert Book.localize_many([book], 'fr')[book].title == u'Les mille et une nuits'
+        assert self.cache.stats()['hits'] == 1
+
+    def test_invalidation(self):
+        book = Book.get(1)
+        book.get_localized('de')
+        book.add_locale('de', title=u'Tausendundeine Nacht')
+        fr = book.get_localized('fr')
+        fr.title = u'Les mille et deux nuits'
+        session.commit()
+        session.expunge_all()
+        book = Book.get(1)
+        assert book.get_localized('de').title == u'Tausendundeine Nacht'
+        assert book.get_localized('fr').title == u'Les mille et deux nuits'
+
+    def test_invalidate_class(self):
+        Book.get(1).get_localized('fr')
+        session.expunge_all()
+        session.execute(Book.__localized_table__.update().values(title=u'changed'))
+        self.cache.invalidate_class(Book.__localized_class__)
+        assert Book.get(1).get_localized('fr').title == u'changed'
+        # the version is kept in the backend, shared with other processes
+        other = LocalizedCache(self.cache.backend)
+        session.expunge_all()
+        session.execute(Book.__localized_table__.update().values(title=u'again'))
+        other.invalidate_class(Book.__localized_class__)
+        assert Book.get(1).get_localized('fr').title == u'again'
+
+    def test_rollback(self):
+        book = Book.get(1)
+        book.add_locale('de', title=u'phantom')
+        session.flush()
+        assert Book.localize_many([book], 'de')[book].title == u'phantom'
+        book.get_localized('fr')
+        session.rollback()
+        session.expunge_all()
+        assert len(self.cache.backend) == 0
+        assert Book.get(1).get_localized('de') is None
+        assert Book.get(1).get_localized('fr').title == u'Les mille et une nuits'
+
+    def test_held_until_commit(self):
+        fr = Book.get(1).get_localized('fr')
+        fr.title = u'Les mille et deux nuits'
+        session.flush()
+        session.expunge_all()
+        assert Book.get(1).get_localized('fr').title == u'Les mille et deux nuits'
+        # other sessions keep reading the committed translation
+        assert len(self.cache.backend) == 0
+        session.commit()
+        session.expunge_all()
+        session.execute(Book.__localized_table__.update().values(title=u'changed'))
+        assert Book.get(1).get_localized('fr').title == u'Les mille et deux nuits'
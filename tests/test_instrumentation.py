@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+from elixir import has_field, Unicode, using_options
+from elixir import Entity
+from elixirext.localized import acts_as_localized, LocalizedStats, \
+        set_localized_stats, set_session_stats, record_localized, \
+        assert_max_localized_queries, instrument_engine
+import unittest
+import threading
+
+from sqlalchemy import create_engine
+from elixir import setup_all, create_all, drop_all
+
+from elixir import metadata, session
+
+from tests import engine
+
+class Poem(Entity):
+    has_field('author', Unicode)
+    has_field('title', Unicode)
+
+    acts_as_localized(for_fields=['title'], default_locale='en')
+    using_options(tablename='poems')
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        """Method used to build a database"""
+        metadata.bind = engine
+        setup_all()
+        create_all()
+
+        poem = Poem(author=u'Baudelaire', title=u'The Albatross')
+        poem.add_locale('fr', title=u"L'Albatros")
+        session.commit()
+        session.expunge_all()
+        instrument_engine(metadata.bind)
+
+    def tearDown(self):
+        """Method used to destroy a database"""
+        set_localized_stats(None)
+        set_session_stats(session, None)
+        session.rollback()
+        session.expunge_all()
+        drop_all()
+
+    def test_assert_max_localized_queries(self):
+        poem = Poem.get(1)
+        with assert_max_localized_queries(1) as stats:
+            poem.get_localized('fr')
+            poem.get_localized('fr')
+            poem.get_localized('en')
+        assert stats.queries == 1
+        assert 'poems_localized' in stats.statements[0]
+        poem = Poem.get(1)
+        poem.__dict__.pop('_localized_slot', None)
+        session.expunge_all()
+        poem = Poem.get(1)
+        try:
+            with assert_max_localized_queries(0):
+                poem.get_localized('de')
+        except AssertionError, error:
+            assert '1 localized queries issued' in str(error)
+        else:
+            self.fail('no AssertionError raised')
+
+    def test_record_localized(self):
+        with record_localized() as stats:
+            poem = Poem.get(1)
+            fr = poem.get_localized('fr')
+            poem.get_many_localized(['fr', 'de'])
+            poem.add_locale('de', title=u'Der Albatros')
+            session.flush()
+            poem.delete_locale('de')
+            poem.extra = u'read through the entity'
+            assert fr.extra == u'read through the entity'
+            session.flush()
+        assert stats.counts['get_localized'] == 1
+        assert stats.counts['get_many_localized'] == 1
+        assert stats.counts['add_locale'] == 1
+        assert stats.counts['delete_locale'] == 1
+        assert stats.counts['get_localized_attr'] == 1
+        assert stats.timings['get_localized'] > 0
+        # the query of get_localized, the one of get_many_localized,
+        # the insert and the delete
+        assert stats.queries == 4
+        assert stats.report()['queries'] == 4
+        # reads delegated to the entity are counted too
+        with record_localized() as reads:
+            assert fr.author == u'Baudelaire'
+            assert fr.author == u'Baudelaire'
+        assert reads.counts['get_localized_attr'] == 2
+
+    def test_transaction_begun_before(self):
+        session.close()
+        metadata.bind = create_engine('sqlite://')
+        try:
+            create_all()
+            Poem(author=u'Baudelaire', title=u'The Albatross')
+            session.flush()
+            # the connection of the transaction is already checked out
+            with record_localized() as stats:
+                Poem.get(1).get_localized('fr')
+            assert stats.queries == 1
+        finally:
+            session.close()
+            metadata.bind = engine
+
+    def test_proxy_installed_while_on(self):
+        plain = metadata.bind.Connection
+        with record_localized():
+            assert issubclass(metadata.bind.Connection, plain)
+            assert metadata.bind.Connection is not plain
+        # statements pay nothing once instrumentation is off
+        assert metadata.bind.Connection is plain
+
+    def test_threads(self):
+        def record():
+            with record_localized():
+                pass
+        with record_localized() as stats:
+            thread = threading.Thread(target=record)
+            thread.start()
+            thread.join()
+            # another thread stopping recording does not stop this one
+            Poem.get(1).get_localized('fr')
+        assert stats.counts['get_localized'] == 1
+        assert stats.queries == 1
+
+    def test_session_stats(self):
+        stats = LocalizedStats()
+        set_session_stats(session, stats)
+        Poem.get(1).get_localized('fr')
+        Poem.localize_many([1], 'fr')
+        assert stats.counts == {'get_localized': 1, 'localize_many': 1,
+                                'sql': 2}
+        set_session_stats(session, None)
+        session.expunge_all()
+        Poem.get(1).get_localized('fr')
+        assert stats.counts['get_localized'] == 1
+
+    def test_global_stats(self):
+        stats = LocalizedStats()
+        set_localized_stats(stats)
+        Poem.get(1).get_localized('fr')
+        set_localized_stats(None)
+        Poem.get(1).get_localized('de')
+        assert stats.counts['get_localized'] == 1
+        assert stats.queries == 1
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+from elixir import has_field, Unicode, using_options
+from elixir import Entity
+from elixirext.localized import acts_as_localized, record_localized
+
+from elixir import setup_all, create_all, drop_all
+
+from elixir import metadata, session
+import unittest
+from tests import engine
+
+from zope.interface import Interface
+from zope.interface import implements
+
+class IPage(Interface):
+    """ marker interface
+    """
+
+class Page(Entity):
+    has_field('author', Unicode)
+    has_field('title', Unicode)
+    has_field('content', Unicode)
+    using_options(tablename='pages')
+    acts_as_localized(for_fields=['title', 'content'], default_locale='en',
+                      storage='json')
+
+    implements(IPage)
+
+class Recipe(Page):
+    has_field('ingredients', Unicode)
+    using_options(inheritance='multi', polymorphic=True, tablename='recipes')
+    acts_as_localized(for_fields=['ingredients'], default_locale='en')
+
+
+class TestJsonStorage(unittest.TestCase):
+
+    def setUp(self):
+        """Method used to build a database"""
+        metadata.bind = engine
+        setup_all()
+        create_all()
+
+        page = Page(author=u'unknown', title=u'A Thousand and one nights',
+                    content=u'It has been related to me')
+        page.add_locale('fr', title=u'Les mille et une nuits',
+                        content=u"J'ai entendu dire")
+        session.commit()
+        session.expunge_all()
+        self.page = Page.get(1)
+
+    def tearDown(self):
+        """Method used to destroy a database"""
+        session.rollback()
+        drop_all()
+
+    def test_no_table(self):
+        assert metadata.tables.get('pages_localized') is None
+        assert 'localized_data' in Page.table.c
+
+    def test_get_localized(self):
+        fr = self.page.get_localized('fr')
+        assert fr is self.page.get_localized('fr')
+        assert fr.title == u'Les mille et une nuits'
+        assert fr.author == u'unknown'
+        assert fr.locale_id == 'fr'
+        assert fr.translated_id == 1
+        assert IPage.providedBy(fr)
+        assert self.page.get_localized('en') is self.page
+        assert self.page.get_localized('bogus') is None
+        assert self.page.aget_localized('fr').result() is fr
+
+    def test_recorded(self):
+        fr = self.page.get_localized('fr')
+        with record_localized() as stats:
+            assert getattr(fr, 'bogus', u'default') == u'default'
+            assert not hasattr(fr, 'bogus')
+            assert fr.author == u'unknown'
+        assert stats.counts['get_localized_attr'] == 3
+
+    def test_many_and_all_localized(self):
+        de = self.page.add_locale('de', title=u'Tausendundeine Nacht')
+        fr = self.page.get_localized('fr')
+        assert self.page.get_many_localized(['fr', 'de', 'en', 'bogus']) == \
+               [fr, de, self.page]
+        assert self.page.get_all_localized() == [de, fr]
+        assert de.content is None
+
+    def test_edit_and_delete(self):
+        self.page.edit_locale('fr', title=u'Les mille et deux nuits')
+        self.page.set_locales({'de': {'title': u'Tausendundeine Nacht'}})
+        session.commit()
+        session.expunge_all()
+        page = Page.get(1)
+        assert page.get_localized('fr').title == u'Les mille et deux nuits'
+        assert page.get_localized('fr').content == u"J'ai entendu dire"
+        assert page.get_localized('de').title == u'Tausendundeine Nacht'
+        page.delete_locale('fr')
+        session.commit()
+        session.expunge_all()
+        assert Page.get(1).get_localized('fr') is None
+
+    def test_purge_locale(self):
+        page = Page(author=u'Galland', title=u'Sindbad')
+        page.add_locale('de', title=u'Sindbad der Seefahrer')
+        page.add_locale('fr', title=u'Sindbad le marin')
+        Page(author=u'Galland', title=u'The Arabian Nights')
+        session.commit()
+        assert Page.purge_locale('fr', batch_size=1) == 2
+        assert self.page.get_localized('fr') is None
+        assert page.get_localized('de').title == u'Sindbad der Seefahrer'
+        session.commit()
+        session.expunge_all()
+        assert Page.translation_coverage() == {'en': 3, 'de': 1}
+
+    def test_get_localized_chain(self):
+        ca = self.page.add_locale('fr-CA', title=u'Les mille et une nuits (Québec)')
+        assert self.page.get_localized_chain(['fr-CA', 'fr']) is ca
+        merged = Page.localize_many_chain([1], ['fr-CA', 'fr'], per_field=True)[self.page]
+        assert merged.title == u'Les mille et une nuits (Québec)'
+        assert merged.content == u"J'ai entendu dire"
+
+    def test_localized_rows(self):
+        self.page.add_locale('de', title=u'Tausendundeine Nacht')
+        session.commit()
+        rows = list(Page.localized_rows('fr', fields=['id', 'author', 'title',
+                                                      'locale_id']))
+        assert rows == [(1, u'unknown', u'Les mille et une nuits', 'fr')]
+        row, = Page.localized_rows('de')
+        assert row.title == u'Tausendundeine Nacht'
+        assert row.content is None
+
+    def test_localized_pivot(self):
+        self.page.add_locale('de', title=u'Tausendundeine Nacht')
+        Page(author=u'Galland', title=u'Sindbad')
+        session.commit()
+        rows = list(Page.localized_pivot(['en', 'fr', 'de'], fields=['title'],
+                                         query=Page.query.filter_by(author=u'unknown')))
+        assert rows == [(1, self.page.title, u'Les mille et une nuits',
+                         u'Tausendundeine Nacht')]
+        assert [row.content_de for row in Page.localized_pivot(['de'])] == [None, None]
+
+    def test_iter_localized(self):
+        Page(author=u'Galland', title=u'The Arabian Nights')
+        page = Page(author=u'Galland', title=u'Sindbad')
+        page.add_locale('fr', title=u'Sindbad le marin')
+        session.commit()
+        session.expunge_all()
+        pairs = [(item.id, fr.title)
+                 for item, fr in Page.iter_localized('fr', chunk_size=1)]
+        assert pairs == [(1, u'Les mille et une nuits'), (3, u'Sindbad le marin')]
+        assert len(session.identity_map) == 0
+
+    def test_statistics(self):
+        Page(author=u'Galland', title=u'The Arabian Nights')
+        session.commit()
+        assert Page.translation_coverage() == {'en': 2, 'fr': 1}
+        assert Page.missing_locales(['fr', 'en']) == {'fr': [2], 'en': []}
+        self.assertRaises(RuntimeError, Page.stale_translations)
+        self.assertRaises(RuntimeError, Page.search, u'nights')
+
+    def test_polymorphic(self):
+        recipe = Recipe(author=u'Shahrazad', title=u'Kunafa',
+                        ingredients=u'semolina')
+        recipe.add_locale('fr', title=u'Knafeh', ingredients=u'semoule')
+        session.commit()
+        session.expunge_all()
+        recipe = Recipe.query.one()
+        fr = recipe.get_localized('fr')
+        assert isinstance(fr, Page.__localized_class__)
+        assert fr.title == u'Knafeh'
+        assert fr.ingredients == u'semoule'
+        localized = Page.localize_many(Page.query.all(), 'fr')
+        assert localized[recipe] is fr
+
+    def test_import_export(self):
+        Page.import_translations([(1, 'de', {'title': u'Tausendundeine Nacht'}),
+                                  (1, 'fr', {'content': u'Il était une fois'})],
+                                 upsert=True)
+        assert list(Page.export_translations()) == [
+                (1, 'de', {'title': u'Tausendundeine Nacht'}),
+                (1, 'fr', {'title': u'Les mille et une nuits',
+                           'content': u'Il était une fois'})]
+        self.assertRaises(ValueError, Page.import_translations,
+                          [(1, 'de', {'title': u'Tausendundeine Nacht'})])
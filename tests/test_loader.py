@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+from elixir import has_field, Unicode, using_options
+from elixir import Entity
+from elixirext.localized import acts_as_localized, LocalizedLoader
+import unittest
+
+from elixir import setup_all, create_all, drop_all
+
+from elixir import metadata, session
+
+from tests import engine
+
+class Fable(Entity):
+    has_field('author', Unicode)
+    has_field('title', Unicode)
+
+    acts_as_localized(for_fields=['title'], default_locale='fr')
+    using_options(tablename='fables')
+
+class Parable(Fable):
+    has_field('moral', Unicode)
+    using_options(inheritance='multi', polymorphic=True, tablename='parables')
+    acts_as_localized(for_fields=['moral'], default_locale='fr')
+
+
+class TestLocalizedLoader(unittest.TestCase):
+
+    def setUp(self):
+        """Method used to build a database"""
+        metadata.bind = engine
+        setup_all()
+        create_all()
+
+        fable = Fable(author=u'La Fontaine', title=u'La Cigale et la Fourmi')
+        fable.add_locale('en', title=u'The Ant and the Grasshopper')
+        fable.add_locale('de', title=u'Die Grille und die Ameise')
+        parable = Parable(author=u'La Fontaine', title=u'Le Loup et l\'Agneau',
+                          moral=u'La raison du plus fort est toujours la meilleure')
+        parable.add_locale('en', title=u'The Wolf and the Lamb',
+                           moral=u'Might makes right')
+        Fable(author=u'La Fontaine', title=u'Le Corbeau et le Renard')
+        session.commit()
+        session.expunge_all()
+
+    def tearDown(self):
+        """Method used to destroy a database"""
+        session.rollback()
+        drop_all()
+
+    def test_siblings_batched(self):
+        loader = LocalizedLoader(session)
+        with loader:
+            fables = Fable.query.order_by(Fable.id).all()
+            assert [fable.get_localized('en') and fable.get_localized('en').title
+                    for fable in fables] == \
+                   [u'The Ant and the Grasshopper', u'The Wolf and the Lamb', None]
+            assert loader.queries == 1
+            # subclasses columns were loaded along
+            assert fables[1].get_localized('en').moral == u'Might makes right'
+            # a new language is asked for all the entities at once
+            assert [fable.get_localized('de') is None for fable in fables] == \
+                   [False, True, True]
+            assert fables[0].get_many_localized(['en', 'de'])[1].title == \
+                   u'Die Grille und die Ameise'
+            assert loader.queries == 2
+
+    def test_load(self):
+        fable = Fable.get(1)
+        loader = LocalizedLoader(session)
+        with loader:
+            loader.load(fable, 'en')
+            loader.load(fable, 'de')
+            assert fable.get_localized('en').title == u'The Ant and the Grasshopper'
+            session.execute(Fable.__localized_table__.update().values(title=u'changed'))
+            assert fable.get_localized('de').title == u'Die Grille und die Ameise'
+            assert loader.queries == 1
+
+    def test_inactive(self):
+        loader = LocalizedLoader(session)
+        fables = Fable.query.all()
+        for fable in fables:
+            fable.get_localized('en')
+        assert loader.queries == 0
+        with loader:
+            pass
+        # results are not used once deactivated
+        fable = Fable.query.first()
+        fable.get_localized('en')
+        assert loader.queries == 0
+
+    def test_write_then_read(self):
+        with LocalizedLoader(session):
+            fable = Fable.get(3)
+            assert fable.get_localized('en') is None
+            fable.add_locale('en', title=u'The Fox and the Crow')
+            assert fable.get_localized('en').title == u'The Fox and the Crow'
+            session.commit()
+            assert fable.get_localized('en').title == u'The Fox and the Crow'
+
+    def test_rollback(self):
+        with LocalizedLoader(session):
+            fable = Fable.get(3)
+            fable.add_locale('en', title=u'The Fox and the Crow')
+            session.flush()
+            fable.__dict__.pop('_localized_slot')
+            assert fable.get_localized('en').title == u'The Fox and the Crow'
+            session.rollback()
+            assert fable.get_localized('en') is None
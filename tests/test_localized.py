@@ -1,7 +1,11 @@
 # -*- coding: utf-8 -*-
 from elixir import has_field, Unicode, Date, using_options
 from elixir import Entity
-from elixirext.localized import acts_as_localized
+from elixirext.localized import acts_as_localized, \
+        read_translations_csv, write_translations_csv, \
+        read_translations_json, write_translations_json, \
+        read_translations_po, write_translations_po
+from StringIO import StringIO
 import unittest
 
 from elixir import setup_all, create_all, drop_all, cleanup_all
@@ -25,7 +29,8 @@ class Article(Entity):
     has_field('content', Unicode)
     has_field('release', Date)
 
-    acts_as_localized(for_fields=['title', 'content'], default_locale='en')
+    acts_as_localized(for_fields=['title', 'content'], default_locale='en',
+                      fallbacks={'fr-CA': ['fr'], 'fr': ['en']})
     using_options(tablename='articles')
 
     type = 'some article'
@@ -36,6 +41,14 @@ class Article(Entity):
     def my_method(self):
         return 'lorem'
 
+class Essay(Entity):
+    has_field('author', Unicode)
+    has_field('title', Unicode)
+
+    acts_as_localized(for_fields=['title'], default_locale='en',
+                      covering_fields=['title'], type_index=True)
+    using_options(tablename='essays')
+
 class TestLocalized(unittest.TestCase):
 
     def setUp(self):
@@ -83,6 +96,17 @@ class TestLocalized(unittest.TestCase):
         assert self.article.default_locale == 'en'
         assert self.article.get_localized('en').title == self.article.title
 
+    def test_get_localized_from_session(self):
+        self.article.add_locale('fr', title='Les mille et une nuits', content=u"J'ai entendu dire, Ô mon roi, dit Scheherazade")
+        session.commit()
+        fr = self.article.get_localized('fr')
+        self.article.__dict__.pop('_localized_slot')
+        session.execute(Article.__localized_table__.delete())
+        # found in the identity map, without any query
+        assert self.article.get_localized('fr') is fr
+        assert self.article.get_localized('en') is self.article
+        assert self.article.get_localized('de') is None
+
     def test_get_many_localized(self):
         ar = self.article.add_locale('ar', title=u'كتاب ألف ليلة وليلة‎', content=u"قمة الأدب العربى ودرته وتاجه على مر تاريخه" )
         fr = self.article.add_locale('fr', title='Les mille et une nuits', content=u"J'ai entendu dire, Ô mon roi, dit Scheherazade")
@@ -92,6 +116,152 @@ class TestLocalized(unittest.TestCase):
         assert ar in translations
         assert self.article in translations
 
+    def test_localize_many(self):
+        other = Article(author='unknown', title='The Arabian Nights', content='Once upon a time')
+        untranslated = Article(author='unknown', title='Sindbad', content='The sailor', default_locale='fr')
+        fr = self.article.add_locale('fr', title='Les mille et une nuits', content=u"J'ai entendu dire, Ô mon roi, dit Scheherazade")
+        other_fr = other.add_locale('fr', title='Les nuits arabes', content=u'Il était une fois')
+        session.flush()
+        localized = Article.localize_many([self.article, other, untranslated], 'fr')
+        assert localized[self.article] is fr
+        assert localized[other] is other_fr
+        # default locale falls back to the entity itself
+        assert localized[untranslated] is untranslated
+
+    def test_localize_many_ids(self):
+        fr = self.article.add_locale('fr', title='Les mille et une nuits', content=u"J'ai entendu dire, Ô mon roi, dit Scheherazade")
+        session.flush()
+        localized = Article.localize_many([self.article.id], 'fr')
+        assert localized == {self.article: fr}
+        assert Article.localize_many([self.article.id], 'de') == {self.article: None}
+
+    def test_localized_query(self):
+        other = Article(author='unknown', title='The Arabian Nights', content='Once upon a time')
+        fr = self.article.add_locale('fr', title='Les mille et une nuits', content=u"J'ai entendu dire, Ô mon roi, dit Scheherazade")
+        session.commit()
+        session.expunge_all()
+        articles = list(Article.localized_query('fr', Article.query.order_by(Article.id)))
+        assert len(articles) == 2
+        session.execute(Article.__localized_table__.update().values(title=u'changed'))
+        # translations were loaded along with the articles
+        assert articles[0].get_localized('fr').title == 'Les mille et une nuits'
+        assert articles[1].get_localized('fr') is None
+        assert articles[1].get_localized('en') is articles[1]
+
+    def test_localized_rows(self):
+        other = Article(author='unknown', title='The Arabian Nights', content='Once upon a time')
+        self.article.add_locale('fr', title='Les mille et une nuits', content=u"J'ai entendu dire, Ô mon roi, dit Scheherazade")
+        session.commit()
+        session.expunge_all()
+        rows = list(Article.localized_rows('fr', fields=['id', 'author', 'title', 'locale_id'],
+                                           batch_size=1))
+        assert rows == [(1, 'unknown', 'Les mille et une nuits', 'fr')]
+        assert rows[0].title == 'Les mille et une nuits'
+        assert rows[0]._asdict()['author'] == 'unknown'
+        # no object was built
+        assert len(session.identity_map) == 0
+        row, = Article.localized_rows('fr')
+        assert row.content == u"J'ai entendu dire, Ô mon roi, dit Scheherazade"
+        assert row.default_locale == 'en'
+        assert list(Article.localized_rows('de')) == []
+        assert_raises(ValueError, list, Article.localized_rows('fr', fields=['bogus']))
+
+    def test_localized_pivot(self):
+        other = Article(author='Galland', title='The Arabian Nights', content='Once upon a time',
+                        default_locale='fr')
+        self.article.add_locale('fr', title='Les mille et une nuits', content=u"J'ai entendu dire")
+        self.article.add_locale('pt-BR', title='As mil e uma noites')
+        other.add_locale('en', title='Arabian Nights')
+        session.commit()
+        other_id = other.id
+        session.expunge_all()
+        rows = list(Article.localized_pivot(['en', 'fr', 'pt-BR'], fields=['title'],
+                                            batch_size=1))
+        assert rows == [(1, 'A Thousand and one nights', 'Les mille et une nuits',
+                         'As mil e uma noites'),
+                        (other_id, 'Arabian Nights', 'The Arabian Nights', None)]
+        assert rows[0]._fields == ('id', 'title_en', 'title_fr', 'title_pt_BR')
+        # no object was built
+        assert len(session.identity_map) == 0
+        row, = Article.localized_pivot(['fr', 'de'],
+                                       query=Article.query.filter_by(author='unknown'))
+        assert row.content_fr == u"J'ai entendu dire"
+        assert row.title_de is None and row.content_de is None
+        assert_raises(ValueError, list, Article.localized_pivot(['fr'], fields=['author']))
+
+    def test_iter_localized(self):
+        Article(author='unknown', title='Sindbad', content='The sailor')
+        other = Article(author='Galland', title='The Arabian Nights', content='Once upon a time')
+        self.article.add_locale('fr', title='Les mille et une nuits', content=u"J'ai entendu dire, Ô mon roi, dit Scheherazade")
+        other.add_locale('fr', title='Les nuits arabes', content=u'Il était une fois')
+        other.add_locale('de', title=u'Arabische Nächte', content=u'Es war einmal')
+        session.commit()
+        other_id = other.id
+        session.expunge_all()
+        pairs = [(article.id, fr.title, fr.author, article.get_localized('fr') is fr)
+                 for article, fr in Article.iter_localized('fr', chunk_size=1)]
+        assert pairs == [(1, 'Les mille et une nuits', 'unknown', True),
+                         (other_id, 'Les nuits arabes', 'Galland', True)]
+        # nothing was attached to the session
+        assert len(session.identity_map) == 0
+
+    def test_cached_localized(self):
+        fr = self.article.add_locale('fr', title='Les mille et une nuits', content=u"J'ai entendu dire, Ô mon roi, dit Scheherazade")
+        session.commit()
+        session.expunge_all()
+        article = Article.get(1)
+        fr = article.get_localized('fr')
+        assert article.get_localized('bogus') is None
+        ar = article.add_locale('ar', title=u'كتاب ألف ليلة وليلة‎')
+        session.flush()
+        session.execute(Article.__localized_table__.update().values(title=u'changed'))
+        # answered from memory, including missing locales
+        assert article.get_localized('fr') is fr
+        assert article.get_localized('ar') is ar
+        assert article.get_many_localized(['fr', 'ar', 'bogus', 'en']) == [fr, ar, article]
+        article.delete_locale('ar')
+        assert article.get_localized('ar') is None
+        session.execute(Article.__localized_table__.insert().values(
+                translated_id=article.id, locale_id='bogus',
+                translated_type=u'article_localized', title=u'bogus'))
+        assert article.get_localized('bogus') is None
+        # expiring the article forgets what was known
+        session.expire(article)
+        assert article.get_localized('bogus').title == u'bogus'
+
+    def test_cached_localized_rollback(self):
+        session.commit()
+        fr = self.article.add_locale('fr', title='Les mille et une nuits', content=u"J'ai entendu dire, Ô mon roi, dit Scheherazade")
+        assert self.article.get_localized('fr') is fr
+        session.rollback()
+        assert self.article.get_localized('fr') is None
+
+    def test_get_localized_chain(self):
+        fr = self.article.add_locale('fr', title='Les mille et une nuits', content=u"J'ai entendu dire, Ô mon roi, dit Scheherazade")
+        ca = self.article.add_locale('fr-CA', title=u'Les mille et une nuits (Québec)')
+        assert self.article.get_localized_chain('fr-CA') is ca
+        assert self.article.get_localized_chain(['de', 'fr']) is fr
+        assert self.article.get_localized_chain(['de', 'en']) is self.article
+        assert self.article.get_localized_chain('de') is None
+        merged = self.article.get_localized_chain('fr-CA', per_field=True)
+        assert merged.locale_id == 'fr-CA'
+        assert merged.title == u'Les mille et une nuits (Québec)'
+        assert merged.content == u"J'ai entendu dire, Ô mon roi, dit Scheherazade"
+        assert merged.author == 'unknown'
+
+    def test_localize_many_chain(self):
+        other = Article(author='unknown', title='The Arabian Nights', content='Once upon a time')
+        fr = self.article.add_locale('fr', title='Les mille et une nuits', content=u"J'ai entendu dire, Ô mon roi, dit Scheherazade")
+        other_ca = other.add_locale('fr-CA', title=u'Les nuits arabes')
+        session.flush()
+        localized = Article.localize_many_chain([self.article, other], 'fr-CA')
+        assert localized == {self.article: fr, other: other_ca}
+        localized = Article.localize_many_chain([self.article, other], 'fr-CA', per_field=True)
+        assert localized[self.article].title == 'Les mille et une nuits'
+        assert localized[other].title == u'Les nuits arabes'
+        # falls through to the english content of the entity
+        assert localized[other].content == 'Once upon a time'
+
     def test_not_localized_content(self):
         fr = self.article.add_locale('fr', title='Les mille et une nuits', content=u"J'ai entendu dire, Ô mon roi, dit Scheherazade")
         # confirm non-localized content
@@ -118,7 +288,28 @@ class TestLocalized(unittest.TestCase):
         session.expunge_all()
         article = Article.get(1)
         article.edit_locale('fr' , title='Les mille et deux nuits')
-        assert article.get_localized('fr').title == 'Les mille et une nuits'
+        session.flush()
+        session.expunge_all()
+        article = Article.get(1)
+        assert article.get_localized('fr').title == 'Les mille et deux nuits'
+
+    def test_set_locales(self):
+        fr = self.article.add_locale('fr', title='Les mille et une nuits', content=u"J'ai entendu dire, Ô mon roi, dit Scheherazade")
+        session.commit()
+        session.expunge_all()
+        article = Article.get(1)
+        localized = article.set_locales({
+                'fr': {'title': u'Les mille et deux nuits'},
+                'de': {'title': u'Tausendundeine Nacht'},
+                'en': {'title': u'The Arabian Nights'}})
+        assert localized['en'] is article
+        session.commit()
+        session.expunge_all()
+        article = Article.get(1)
+        assert article.title == u'The Arabian Nights'
+        assert article.get_localized('fr').title == u'Les mille et deux nuits'
+        assert article.get_localized('fr').content == u"J'ai entendu dire, Ô mon roi, dit Scheherazade"
+        assert article.get_localized('de').title == u'Tausendundeine Nacht'
 
     def test_delete_locale(self):
         fr = self.article.add_locale('fr', title='Les mille et une nuits', content=u"J'ai entendu dire, Ô mon roi, dit Scheherazade")
@@ -131,6 +322,44 @@ class TestLocalized(unittest.TestCase):
         article = Article.get(1)
         assert article.get_localized('fr') == None
 
+    def test_delete_locale_directly(self):
+        fr = self.article.add_locale('fr', title=u'Les mille et une nuits')
+        de = self.article.add_locale('de', title=u'Tausendundeine Nacht')
+        session.flush()
+        ar = self.article.add_locale('ar', title=u'كتاب ألف ليلة وليلة‎')
+        # a pending translation is just dropped
+        self.article.delete_locale('ar')
+        assert ar not in session
+        # a loaded one is deleted without the ORM
+        self.article.delete_locale('fr')
+        assert fr not in session
+        assert self.article.get_localized('fr') is None
+        self.article.delete_locale('en')
+        session.commit()
+        session.expunge_all()
+        article = Article.get(1)
+        assert article.get_many_localized(['fr', 'de', 'ar']) == \
+               [article.get_localized('de')]
+        # an unknown one is deleted without being loaded
+        article.delete_locale('de')
+        assert len(session.identity_map) == 1
+        session.commit()
+        assert session.query(Article.__localized_class__).count() == 0
+
+    def test_purge_locale(self):
+        for i in range(5):
+            article = Article(author=u'Galland', title=u'Tale %d' % i)
+            article.add_locale('fr', title=u'Conte %d' % i)
+            article.add_locale('de', title=u'Märchen %d' % i)
+        session.commit()
+        fr = article.get_localized('fr')
+        assert Article.purge_locale('fr', batch_size=2) == 5
+        assert fr not in session
+        assert article.get_localized('fr') is None
+        assert Article.purge_locale('fr') == 0
+        session.commit()
+        assert Article.translation_coverage() == {'en': 6, 'de': 5}
+
 
     def test_poc_assocproxy(self):
         from datetime import datetime
@@ -159,6 +388,100 @@ class TestLocalized(unittest.TestCase):
         assert self.article.type == 'some article'
         assert fr.type == 'some article'
 
+    def test_not_localized_columns_written_to_entity(self):
+        fr = self.article.add_locale('fr', title='Les mille et une nuits', content=u"J'ai entendu dire, Ô mon roi, dit Scheherazade")
+        fr.author = u'Antoine Galland'
+        assert self.article.author == u'Antoine Galland'
+
+    def test_precomputed_attributes(self):
+        fr = self.article.add_locale('fr', title='Les mille et une nuits', content=u"J'ai entendu dire, Ô mon roi, dit Scheherazade")
+        localized_class = Article.__localized_class__
+        # columns are written through, hence known beforehand
+        for name in ('author', 'release'):
+            assert name in localized_class.__dict__
+        # other attributes get their descriptor at first access
+        assert fr.get_localized('fr') is fr
+        assert fr.my_method == 'lorem'
+        assert fr.type == 'some article'
+        for name in ('my_method', 'type', 'get_localized'):
+            assert name in localized_class.__dict__
+        assert fr.id == self.article.id
+
+    def test_import_translations(self):
+        records = [(1, 'fr', {'title': u'Les mille et une nuits'}),
+                   (1, 'de', {'title': u'Tausendundeine Nacht', 'content': u'Es war einmal'})]
+        assert Article.import_translations(iter(records), batch_size=1) == 2
+        assert self.article.get_localized('fr').title == u'Les mille et une nuits'
+        assert self.article.get_localized('fr').content is None
+        assert self.article.get_localized('de').content == u'Es war einmal'
+
+    def test_import_translations_upsert(self):
+        fr = self.article.add_locale('fr', title='Les mille et une nuits', content=u"J'ai entendu dire, Ô mon roi, dit Scheherazade")
+        session.commit()
+        records = [(1, 'fr', {'title': u'Les mille et deux nuits'}),
+                   (1, 'de', {'title': u'Tausendundeine Nacht'})]
+        Article.import_translations(records, upsert=True)
+        session.expire_all()
+        article = Article.get(1)
+        assert article.get_localized('fr').title == u'Les mille et deux nuits'
+        assert article.get_localized('fr').content == u"J'ai entendu dire, Ô mon roi, dit Scheherazade"
+        assert article.get_localized('de').title == u'Tausendundeine Nacht'
+
+    def test_import_translations_one_field_per_record(self):
+        self.article.add_locale('de', title=u'Tausendundeine Nacht')
+        session.commit()
+        records = [(1, 'fr', {'title': u'Les mille et une nuits'}),
+                   (1, 'de', {'content': u'Es war einmal'}),
+                   (1, 'fr', {'content': u"J'ai entendu dire"})]
+        Article.import_translations(records, upsert=True)
+        session.expire_all()
+        article = Article.get(1)
+        assert article.get_localized('fr').title == u'Les mille et une nuits'
+        assert article.get_localized('fr').content == u"J'ai entendu dire"
+        assert article.get_localized('de').title == u'Tausendundeine Nacht'
+        assert article.get_localized('de').content == u'Es war einmal'
+
+    def test_import_translations_unknown_id(self):
+        assert_raises(ValueError, Article.import_translations,
+                      [(42, 'fr', {'title': u'Les mille et une nuits'})])
+
+    def test_export_translations(self):
+        self.article.add_locale('fr', title='Les mille et une nuits', content=u"J'ai entendu dire")
+        self.article.add_locale('de', title=u'Tausendundeine Nacht')
+        session.flush()
+        assert list(Article.export_translations(batch_size=1)) == [
+                (1, 'de', {'title': u'Tausendundeine Nacht', 'content': None}),
+                (1, 'fr', {'title': u'Les mille et une nuits', 'content': u"J'ai entendu dire"})]
+        assert [record[1] for record in Article.export_translations(['fr'])] == ['fr']
+
+    def test_translation_files(self):
+        records = [(1, 'fr', {'title': u'Les mille et une nuits', 'content': u'"Ô mon roi"\net la suite'}),
+                   (2, 'fr', {'title': u'Sindbad'})]
+        csv_file = StringIO()
+        write_translations_csv(csv_file, records, ['title', 'content'])
+        csv_file.seek(0)
+        assert list(read_translations_csv(csv_file)) == records
+        json_file = StringIO()
+        write_translations_json(json_file, records)
+        json_file.seek(0)
+        assert list(read_translations_json(json_file)) == records
+        po_file = StringIO()
+        write_translations_po(po_file, records, 'fr')
+        po_file.seek(0)
+        assert list(read_translations_po(po_file, 'fr')) == records
+
+    def test_locale_index(self):
+        indexes = dict((index.name, [column.name for column in index.columns])
+                       for index in Article.__localized_table__.indexes)
+        assert indexes == {'ix_articles_localized_locale_id': ['locale_id', 'translated_id']}
+
+    def test_covering_index(self):
+        indexes = dict((index.name, [column.name for column in index.columns])
+                       for index in Essay.__localized_table__.indexes)
+        assert indexes == {
+            'ix_essays_localized_locale_id': ['locale_id', 'translated_id', 'title'],
+            'ix_essays_localized_translated_type': ['translated_type', 'locale_id']}
+
     @do_it
     def test_interface(self):
         fr = self.article.add_locale('fr', title='Les mille et une nuits', content=u"J'ai entendu dire, Ô mon roi, dit Scheherazade")
@@ -59,6 +59,9 @@ class TestPolymorphLocalized(unittest.TestCase):
         assert retrieved_movie.get_localized('fr').title == 'Les mille et une nuits'
         # movie attribute
         assert retrieved_movie.get_localized('fr').resume == u'déconseillé au jeune public'
+        # attributes inherited from media
+        assert retrieved_movie.get_localized('fr').author == 'unknown'
+        assert retrieved_movie.get_localized('fr').default_locale == 'en'
 
     def test_create_other_default(self):
         movie = Movie(author='Proust', title=u'À la recherche du temps perdu',
@@ -95,3 +98,162 @@ class TestPolymorphLocalized(unittest.TestCase):
         assert retrieved_image.get_localized('fr').title == u'À la recherche du temps perdu'
         assert retrieved_image.get_localized('en').title == 'In Search of Lost Time and Remembrance of Things Past'
 
+    def test_localize_many(self):
+        movie = Movie(author='unknown', title='A Thousand and one nights',
+                      content='It has been related to me, O happy King, said Shahrazad',
+                      resume='not suitable for young children')
+        image = Image(author='Proust', title=u'À la recherche du temps perdu',
+                      width = 55)
+        movie.add_locale('fr', title='Les mille et une nuits',
+                         resume=u'déconseillé au jeune public')
+        image.add_locale('fr', title=u'À la recherche du temps perdu')
+        session.commit()
+        session.expunge_all()
+        medias = Media.query.all()
+        localized = Media.localize_many(medias, 'fr')
+        retrieved_movie = Movie.query.one()
+        retrieved_image = Image.query.one()
+        assert localized[retrieved_movie].title == 'Les mille et une nuits'
+        assert localized[retrieved_movie].resume == u'déconseillé au jeune public'
+        assert localized[retrieved_image].title == u'À la recherche du temps perdu'
+        assert Media.localize_many(medias, 'en') == {retrieved_movie: retrieved_movie,
+                                                     retrieved_image: retrieved_image}
+
+    def test_localized_rows(self):
+        movie = Movie(author=u'unknown', title=u'A Thousand and one nights',
+                      resume=u'not suitable for young children')
+        media = Media(author=u'Galland', title=u'The Arabian Nights')
+        movie.add_locale('fr', title=u'Les mille et une nuits',
+                         resume=u'déconseillé au jeune public')
+        media.add_locale('fr', title=u'Les nuits arabes')
+        session.commit()
+        session.expunge_all()
+        assert list(Movie.localized_rows('fr', fields=['author', 'title', 'resume'])) == \
+               [(u'unknown', u'Les mille et une nuits', u'déconseillé au jeune public')]
+        assert [row.title for row in Media.localized_rows('fr')] == \
+               [u'Les mille et une nuits', u'Les nuits arabes']
+
+    def test_export_translations(self):
+        movie = Movie(author=u'unknown', title=u'A Thousand and one nights',
+                      resume=u'not suitable for young children')
+        media = Media(author=u'Galland', title=u'The Arabian Nights')
+        movie.add_locale('fr', title=u'Les mille et une nuits',
+                         resume=u'déconseillé au jeune public')
+        media.add_locale('fr', title=u'Les nuits arabes')
+        session.commit()
+        movie_id, media_id = movie.id, media.id
+        records = list(Media.export_translations(batch_size=1))
+        assert records == [
+            (movie_id, 'fr', {'title': u'Les mille et une nuits', 'content': None,
+                              'resume': u'déconseillé au jeune public'}),
+            (media_id, 'fr', {'title': u'Les nuits arabes', 'content': None})]
+        assert list(Movie.export_translations()) == records[:1]
+        # a round trip keeps the fields of the subclasses
+        Media.purge_locale('fr')
+        assert Media.import_translations(records) == 2
+        session.commit()
+        session.expunge_all()
+        assert Movie.get(movie_id).get_localized('fr').resume == \
+               u'déconseillé au jeune public'
+
+    def test_localized_pivot(self):
+        movie = Movie(author=u'unknown', title=u'A Thousand and one nights',
+                      resume=u'not suitable for young children')
+        media = Media(author=u'Galland', title=u'The Arabian Nights')
+        movie.add_locale('fr', title=u'Les mille et une nuits',
+                         resume=u'déconseillé au jeune public')
+        media.add_locale('de', title=u'Arabische Nächte')
+        session.commit()
+        assert list(Movie.localized_pivot(['en', 'fr'], fields=['title', 'resume'])) == \
+               [(movie.id, u'A Thousand and one nights', u'Les mille et une nuits',
+                 u'not suitable for young children', u'déconseillé au jeune public')]
+        assert [(row.title_fr, row.title_de) for row in Media.localized_pivot(['fr', 'de'])] == \
+               [(u'Les mille et une nuits', None), (None, u'Arabische Nächte')]
+
+    def test_iter_localized(self):
+        media = Media(author=u'Galland', title=u'The Arabian Nights')
+        movie = Movie(author=u'unknown', title=u'A Thousand and one nights',
+                      resume=u'not suitable for young children')
+        media.add_locale('fr', title=u'Les nuits arabes')
+        movie.add_locale('fr', title=u'Les mille et une nuits',
+                         resume=u'déconseillé au jeune public')
+        session.commit()
+        session.expunge_all()
+        pairs = list(Media.iter_localized('fr', chunk_size=1))
+        assert [type(item) for item, localized in pairs] == [Media, Movie]
+        assert pairs[1][1].resume == u'déconseillé au jeune public'
+        assert pairs[1][1].author == u'unknown'
+        assert [item.id for item, localized in Movie.iter_localized('fr')] == [2]
+
+    def test_import_translations(self):
+        movie = Movie(author='unknown', title='A Thousand and one nights',
+                      resume='not suitable for young children')
+        image = Image(author='Proust', title=u'À la recherche du temps perdu',
+                      width = 55)
+        session.commit()
+        records = [(movie.id, 'fr', {'title': u'Les mille et une nuits',
+                                     'resume': u'déconseillé au jeune public'}),
+                   (image.id, 'fr', {'title': u'À la recherche du temps perdu'})]
+        assert Media.import_translations(records) == 2
+        session.commit()
+        session.expunge_all()
+        retrieved_movie = Movie.query.one()
+        assert retrieved_movie.get_localized('fr').title == 'Les mille et une nuits'
+        assert retrieved_movie.get_localized('fr').resume == u'déconseillé au jeune public'
+        assert Image.query.one().get_localized('fr').title == u'À la recherche du temps perdu'
+        assert list(Movie.export_translations()) == [(retrieved_movie.id, 'fr',
+                {'title': u'Les mille et une nuits', 'content': None,
+                 'resume': u'déconseillé au jeune public'})]
+
+    def test_delete_and_purge(self):
+        movie = Movie(author=u'unknown', title=u'A Thousand and one nights',
+                      resume=u'not suitable for young children')
+        image = Image(author=u'Galland', title=u'The Arabian Nights',
+                      width=55)
+        for media in (movie, image, Movie(title=u'Sindbad', resume=u'sea')):
+            media.add_locale('fr', title=u'Les mille et une nuits',
+                             resume=u'déconseillé au jeune public')
+            media.add_locale('de', title=u'Tausendundeine Nacht',
+                             resume=u'nicht für Kinder')
+        session.commit()
+        movie_table = Movie.__localized_table__
+        # rows of the subclass table go too
+        movie.delete_locale('de')
+        assert session.execute(movie_table.count()).scalar() == 3
+        # only the translations of the movies are purged
+        assert Movie.purge_locale('fr') == 2
+        assert session.execute(movie_table.count()).scalar() == 1
+        assert Media.translation_coverage() == {'en': 3, 'fr': 1, 'de': 2}
+        # entities take their translations along, through ON DELETE CASCADE
+        session.delete(Movie.get(3))
+        session.commit()
+        assert session.execute(movie_table.count()).scalar() == 0
+        assert Media.purge_locale('de') == 1
+        assert Media.translation_coverage() == {'en': 2, 'fr': 1}
+
+    def test_delete_without_foreign_keys(self):
+        # SQLite does not enforce foreign keys by default
+        assert metadata.bind.execute('PRAGMA foreign_keys').scalar() == 0
+        for media in (Media(title=u'The Arabian Nights'),
+                      Movie(title=u'Sindbad', resume=u'sea')):
+            media.add_locale('fr', title=u'Les mille et une nuits',
+                             resume=u'en mer')
+        session.commit()
+        session.expunge_all()
+        movie = Movie.get(2)
+        movie.get_localized('fr')
+        for media in (Media.get(1), movie):
+            session.delete(media)
+        session.commit()
+        for table in (Media.__localized_table__, Movie.__localized_table__):
+            assert session.execute(table.count()).scalar() == 0
+        # a new entity reusing the id finds no orphan translation
+        media = Media(title=u'Aladdin')
+        session.commit()
+        assert media.id == 1
+        assert media.get_localized('fr') is None
+
+    def test_locale_index_on_children(self):
+        for entity in (Media, Movie):
+            table = entity.__localized_table__
+            assert 'ix_%s_locale_id' % table.name in [index.name for index in table.indexes]
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+from elixir import has_field, Unicode, using_options
+from elixir import Entity
+from elixirext.localized import acts_as_localized, SQLiteFTSBackend
+import unittest
+
+from elixir import setup_all, create_all, drop_all
+
+from elixir import metadata, session
+
+from tests import engine
+
+class Story(Entity):
+    has_field('author', Unicode)
+    has_field('title', Unicode)
+    has_field('content', Unicode)
+    using_options(tablename='stories')
+    acts_as_localized(for_fields=['title', 'content'], default_locale='en',
+                      search=True)
+
+class Drama(Story):
+    has_field('cast', Unicode)
+    using_options(inheritance='multi', polymorphic=True, tablename='dramas')
+    acts_as_localized(for_fields=['cast'])
+
+
+class TestSearch(unittest.TestCase):
+
+    def setUp(self):
+        """Method used to build a database"""
+        metadata.bind = engine
+        setup_all()
+        create_all()
+
+        story = Story(author=u'unknown', title=u'A Thousand and One Nights',
+                     content=u'It has been related to me, O happy King')
+        story.add_locale('fr', title=u'Les mille et une nuits',
+                         content=u"J'ai entendu dire, Ô mon roi")
+        Story(author=u'Perrault', title=u'Le petit chaperon rouge',
+              content=u'Il était une fois', default_locale='fr')
+        Drama(author=u'Shakespeare', title=u"A Midsummer Night's Dream",
+              cast=u'Puck, Oberon')
+        session.commit()
+        session.expunge_all()
+
+    def tearDown(self):
+        """Method used to destroy a database"""
+        session.rollback()
+        session.expunge_all()
+        drop_all()
+
+    def titles(self, results):
+        return [entity.title for entity, score in results]
+
+    def test_search_locale(self):
+        assert self.titles(Story.search(u'nuits', locale='fr')) == \
+               [u'A Thousand and One Nights']
+        # translated entities are not matched on their default language
+        assert Story.search(u'thousand', locale='fr') == []
+        # others are, in their default language
+        assert self.titles(Story.search(u'dream', locale='fr')) == \
+               [u"A Midsummer Night's Dream"]
+        assert self.titles(Story.search(u'chaperon', locale='en')) == \
+               [u'Le petit chaperon rouge']
+        # diacritics are ignored
+        assert len(Story.search(u'etait', locale='fr')) == 1
+        # no locale searches the default languages
+        assert self.titles(Story.search(u'thousand')) == \
+               [u'A Thousand and One Nights']
+        assert Story.search(u'nuits') == []
+
+    def test_ranking_and_subclasses(self):
+        results = Story.search(u'night*', locale='en')
+        assert len(results) == 2
+        assert results[0][1] >= results[1][1]
+        assert Story.search(u'night*', locale='en', limit=1) == results[:1]
+        assert self.titles(Drama.search(u'night*', locale='en')) == \
+               [u"A Midsummer Night's Dream"]
+        # fields of subclasses are indexed
+        assert len(Story.search(u'oberon', locale='en')) == 1
+
+    def test_sync(self):
+        story = Story.get(1)
+        fr = story.get_localized('fr')
+        fr.title = u'Contes des mille et une nuits'
+        assert self.titles(Story.search(u'contes', locale='fr')) == \
+               [u'A Thousand and One Nights']
+        story.title = u'Arabian Nights'
+        session.commit()
+        assert self.titles(Story.search(u'arabian')) == [u'Arabian Nights']
+        assert Story.search(u'thousand') == []
+
+        drama = Drama.get(3)
+        drama.add_locale('fr', title=u"Le Songe d'une nuit d'été")
+        session.commit()
+        assert len(Story.search(u'nuit*', locale='fr')) == 2
+        assert Story.search(u'dream', locale='fr') == []
+
+        story.delete_locale('fr')
+        session.commit()
+        assert Story.search(u'nuits', locale='fr') == []
+        assert self.titles(Story.search(u'arabian', locale='fr')) == \
+               [u'Arabian Nights']
+
+        assert Drama.purge_locale('fr') == 1
+        session.commit()
+        assert self.titles(Story.search(u'dream', locale='fr')) == \
+               [u"A Midsummer Night's Dream"]
+
+        session.delete(drama)
+        session.commit()
+        assert Story.search(u'dream', locale='en') == []
+
+    def test_import_translations(self):
+        Story.import_translations([(2, 'en', {'title': u'Little Red Riding Hood'}),
+                                   (3, 'de', {'title': u'Ein Sommernachtstraum',
+                                              'cast': u'Puck'})])
+        assert self.titles(Story.search(u'riding', locale='en')) == \
+               [u'Le petit chaperon rouge']
+        assert len(Story.search(u'puck', locale='de')) == 1
+        Story.import_translations([(2, 'en', {'title': u'Red Cap'})],
+                                  upsert=True)
+        assert Story.search(u'riding', locale='en') == []
+        assert len(Story.search(u'cap', locale='en')) == 1
+
+    def test_options(self):
+        assert isinstance(Story.__localized_search__, SQLiteFTSBackend)
+        assert Drama.__localized_search__ is Story.__localized_search__
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+from elixir import has_field, Unicode, using_options
+from elixir import Entity
+from elixirext.localized import acts_as_localized
+
+from elixir import setup_all, create_all, drop_all
+
+from elixir import metadata, session
+import unittest
+from tests import engine
+
+class Document(Entity):
+    has_field('author', Unicode)
+    has_field('title', Unicode)
+    using_options(tablename='documents')
+    acts_as_localized(for_fields=['title'], default_locale='en',
+                      storage='single')
+
+class Report(Document):
+    has_field('summary', Unicode)
+    using_options(inheritance='multi', polymorphic=True, tablename='reports')
+    acts_as_localized(for_fields=['summary'], default_locale='en')
+
+
+class TestSingleStorage(unittest.TestCase):
+
+    def setUp(self):
+        """Method used to build a database"""
+        metadata.bind = engine
+        setup_all()
+        create_all()
+
+        report = Report(author=u'Rapporteur', title=u'Annual report',
+                        summary=u'All went well')
+        report.add_locale('fr', title=u'Rapport annuel',
+                          summary=u'Tout va bien')
+        session.commit()
+        session.expunge_all()
+
+    def tearDown(self):
+        """Method used to destroy a database"""
+        session.rollback()
+        drop_all()
+
+    def test_single_table(self):
+        assert Report.__localized_table__ is Document.__localized_table__
+        assert 'summary' in Document.__localized_table__.c
+        assert metadata.tables.get('reports_localized') is None
+
+    def test_get_localized(self):
+        report = Report.query.one()
+        fr = report.get_localized('fr')
+        assert isinstance(fr, Report.__localized_class__)
+        assert fr.title == u'Rapport annuel'
+        assert fr.summary == u'Tout va bien'
+        assert fr.author == u'Rapporteur'
+
+    def test_localize_many(self):
+        document = Document(author=u'Anonymous', title=u'Memo')
+        document.add_locale('fr', title=u'Note')
+        session.flush()
+        localized = Document.localize_many(Document.query.all(), 'fr')
+        assert sorted(fr.title for fr in localized.values()) == \
+               [u'Note', u'Rapport annuel']
+
+    def test_import_export(self):
+        report = Report.query.one()
+        Report.import_translations([(report.id, 'de',
+                                     {'title': u'Jahresbericht',
+                                      'summary': u'Alles gut'})])
+        assert list(Report.export_translations(['de'])) == [(report.id, 'de',
+                {'title': u'Jahresbericht', 'summary': u'Alles gut'})]
+        assert report.get_localized('de').summary == u'Alles gut'
+
+    def test_delete_entity(self):
+        session.delete(Report.query.one())
+        session.commit()
+        assert session.query(Document.__localized_class__).count() == 0
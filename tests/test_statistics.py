@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+from elixir import has_field, Unicode, using_options
+from elixir import Entity
+from elixirext.localized import acts_as_localized
+
+from elixir import setup_all, create_all, drop_all
+
+from elixir import metadata, session
+from datetime import datetime
+import unittest
+from tests import engine
+
+class Film(Entity):
+    has_field('director', Unicode)
+    has_field('title', Unicode)
+    using_options(tablename='films')
+    acts_as_localized(for_fields=['title'], default_locale='en',
+                      timestamps=True)
+
+class Documentary(Film):
+    has_field('subject', Unicode)
+    using_options(inheritance='multi', polymorphic=True,
+                  tablename='documentaries')
+    acts_as_localized(for_fields=['subject'], default_locale='en')
+
+
+class TestStatistics(unittest.TestCase):
+
+    def setUp(self):
+        """Method used to build a database"""
+        metadata.bind = engine
+        setup_all()
+        create_all()
+
+        film = Film(director=u'Carné', title=u'Children of Paradise',
+                    default_locale=u'fr')
+        film.add_locale('en', title=u'Children of Paradise')
+        film.add_locale('de', title=u'Kinder des Olymp')
+        documentary = Documentary(director=u'Varda', title=u'The Gleaners',
+                                  subject=u'gleaning')
+        documentary.add_locale('fr', title=u'Les glaneurs et la glaneuse',
+                               subject=u'glanage')
+        Film(director=u'Tati', title=u'Playtime')
+        session.commit()
+        session.expunge_all()
+
+    def tearDown(self):
+        """Method used to destroy a database"""
+        session.rollback()
+        drop_all()
+
+    def test_timestamp_columns(self):
+        assert 'updated_at' in Film.table.c
+        assert 'updated_at' in Film.__localized_table__.c
+        assert 'updated_at' not in Documentary.__localized_table__.c
+        assert Film.get(1).updated_at is not None
+        assert Film.get(1).get_localized('de').updated_at is not None
+
+    def test_translation_coverage(self):
+        assert Film.translation_coverage() == {'en': 3, 'fr': 2, 'de': 1}
+        assert Film.translation_coverage(['de', 'it']) == {'de': 1}
+        assert Documentary.translation_coverage() == {'en': 1, 'fr': 1}
+        # a translation in the default language of an entity counts once
+        Film.import_translations([(3, 'en', {'title': u'Playtime'})])
+        assert Film.translation_coverage() == {'en': 3, 'fr': 2, 'de': 1}
+
+    def test_missing_locales(self):
+        assert Film.missing_locales(['fr', 'de', 'en']) == \
+               {'fr': [3], 'de': [2, 3], 'en': []}
+        assert Documentary.missing_locales(['de']) == {'de': [2]}
+
+    def test_stale_translations(self):
+        assert Film.stale_translations() == []
+        before = datetime.now()
+        Film.get(1).title = u'Les enfants du paradis'
+        # a field of a subclass table changes the stamp of the root table
+        Documentary.get(2).subject = u'gleaners'
+        session.commit()
+        assert Film.stale_translations() == [(1, 'de'), (1, 'en'), (2, 'fr')]
+        assert Film.stale_translations(locale_strings=['de']) == [(1, 'de')]
+        assert Documentary.stale_translations() == [(2, 'fr')]
+        assert Film.stale_translations(since=datetime.now()) == []
+        assert len(Film.stale_translations(since=before)) == 3
+        Film.get(1).edit_locale('de', title=u'Die Kinder des Olymp')
+        Documentary.import_translations([(2, 'fr', {'subject': u'glaneurs'})],
+                                        upsert=True)
+        session.commit()
+        assert Film.stale_translations() == [(1, 'en')]
+
+    def test_adding_locale_is_not_a_change(self):
+        Film.get(3).add_locale('fr', title=u'Playtime')
+        session.commit()
+        assert Film.stale_translations() == []